@@ -13,6 +13,7 @@ from app.core.config import settings
 from app.db.database import Base
 
 # Import all models so Alembic can detect them
+from app.models.refresh_token import RefreshToken  # noqa: F401
 from app.models.user import User  # noqa: F401
 
 # Alembic Config object
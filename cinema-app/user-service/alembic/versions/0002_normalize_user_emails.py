@@ -0,0 +1,76 @@
+"""normalize user emails to lower case
+
+Lower-cases existing emails so ``get_user_by_email`` can match on
+``users.email`` directly and use the unique ``ix_users_email`` index instead of
+scanning ``lower(email)``. The backfill walks the primary key in fixed-size
+ranges, each committed on its own, so no long-lived lock is held on the table.
+The CHECK constraint is then added ``NOT VALID`` and validated separately,
+which on PostgreSQL only takes a SHARE UPDATE EXCLUSIVE lock.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5_000
+CONSTRAINT_NAME = "ck_users_email_lowercase"
+
+# Rows whose lower-cased email is shared with another account (lower-case or
+# not, in this batch or another) are left untouched; they are reported below
+# and must be merged by hand.
+BACKFILL_BATCH = sa.text(
+    """
+    UPDATE users SET email = lower(email)
+    WHERE id > :start AND id <= :stop
+      AND email <> lower(email)
+      AND NOT EXISTS (
+          SELECT 1 FROM users AS other
+          WHERE lower(other.email) = lower(users.email) AND other.id <> users.id
+      )
+    """
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT max(id) FROM users")).scalar() or 0
+
+    with op.get_context().autocommit_block():
+        for start in range(0, max_id, BATCH_SIZE):
+            bind.execute(BACKFILL_BATCH, {"start": start, "stop": start + BATCH_SIZE})
+
+    conflicts = bind.execute(
+        sa.text("SELECT count(*) FROM users WHERE email <> lower(email)")
+    ).scalar()
+    if conflicts:
+        raise RuntimeError(
+            f"{conflicts} user(s) have an email that differs only by case from another "
+            "account; merge them, then re-run the migration"
+        )
+
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            f"ALTER TABLE users ADD CONSTRAINT {CONSTRAINT_NAME} "
+            "CHECK (email = lower(email)) NOT VALID"
+        )
+        op.execute(f"ALTER TABLE users VALIDATE CONSTRAINT {CONSTRAINT_NAME}")
+    else:
+        with op.batch_alter_table("users") as batch_op:
+            batch_op.create_check_constraint(CONSTRAINT_NAME, "email = lower(email)")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_constraint(CONSTRAINT_NAME, type_="check")
@@ -0,0 +1,45 @@
+"""add composite indexes for the keyset-paginated user listing
+
+``GET /api/v1/users`` pages with ``ORDER BY created_at DESC, id DESC`` and a
+``(created_at, id) < (:created_at, :id)`` seek, optionally filtered on
+``user_type`` / ``is_active``. On PostgreSQL the indexes are built
+CONCURRENTLY so writes keep flowing while they build.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_users_created_at_id": ["created_at", "id"],
+    "ix_users_type_active_created_at_id": ["user_type", "is_active", "created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name, "users", columns,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(
+                name, table_name="users",
+                postgresql_concurrently=True, if_exists=True,
+            )
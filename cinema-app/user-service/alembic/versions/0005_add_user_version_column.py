@@ -0,0 +1,36 @@
+"""add users.version for optimistic concurrency
+
+Every profile update bumps the counter. An update sent with ``If-Match``
+runs ``UPDATE … WHERE id = :id AND version = :version``, so a write based on
+a stale read matches no row (``412``) instead of silently overwriting a
+concurrent edit; ORM writes such as ``DELETE /me`` are versioned too and
+answer ``409``. Existing rows start at version 1 through the server default.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("version")
@@ -2,33 +2,107 @@
 API v1 – User endpoints (register, login, profile CRUD, type verification).
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.ext.asyncio import AsyncSession
+import base64
+import json
+import logging
+import secrets
+from datetime import datetime
+from typing import Literal, Optional
 
-from app.core.security import create_access_token, decode_access_token, verify_password
-from app.crud.user import create_user, delete_user, get_user_by_email, get_user_by_id, update_user
-from app.db.database import get_db
-from app.schemas.user import Token, UserCreate, UserResponse, UserUpdate, VerifyTypeRequest
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, Security, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import user_cache
+from app.core.conditional import etag_matches, strong_etag
+from app.core.config import settings
+from app.core.export import EXPORT_MEDIA_TYPES, encode_rows
+from app.core.security import (
+    create_access_token,
+    decode_access_token,
+    get_password_hash_async,
+    needs_rehash,
+    revoke_subject,
+    verify_password_async,
+)
+from app.core.throttle import throttle
+from app.crud.refresh_token import issue_refresh_token, rotate_refresh_token
+from app.crud.user import (
+    EXPORT_COLUMNS,
+    VersionConflict,
+    create_user,
+    delete_user,
+    get_user_by_email,
+    get_user_by_id,
+    get_users_by_ids,
+    is_duplicate_email,
+    list_users,
+    rehash_password,
+    stream_users,
+    update_user,
+)
+from app.db.database import async_read_session, get_db, get_read_db, get_sessionmaker, uses_replica
+from app.models.user import User, UserSnapshot, UserType
+from app.schemas.user import (
+    RefreshRequest,
+    Token,
+    UserBatchRequest,
+    UserBatchResponse,
+    UserCreate,
+    UserPage,
+    UserResponse,
+    UserUpdate,
+    VerifyTypeRequest,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+# ---------------------------------------------------------------------------
+# Replica reads
+# ---------------------------------------------------------------------------
+async def _read_user(db: AsyncSession, lookup, key) -> Optional[User]:
+    """Run ``lookup(db, key)`` on a read session, then release its connection.
+
+    A miss on a replica is retried on the primary so a just-registered user is
+    not rejected because replication has not caught up yet.
+    """
+    user = await lookup(db, key)
+    await db.close()
+    if user is None and uses_replica(db):
+        async with async_read_session() as primary_db:
+            user = await lookup(primary_db, key)
+    return user
 
 
 # ---------------------------------------------------------------------------
 # Dependency – current authenticated user
 # ---------------------------------------------------------------------------
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-):
-    """Decode JWT and return the corresponding User, or 401."""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db),
+) -> UserSnapshot:
+    """Decode JWT and return a snapshot of the corresponding User, or 401.
+
+    Snapshots are served from the in-process user cache when possible, so most
+    authenticated requests do not touch the database at all.
+    """
+    credentials_exception = _credentials_exception()
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
@@ -37,87 +111,236 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    user = await get_user_by_id(db, int(user_id))
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = await _read_user(db, get_user_by_id, user_id)
+        if user is None:
+            raise credentials_exception
+        snapshot = UserSnapshot.from_user(user)
+        user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+async def get_current_db_user(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """Load the authenticated User as an ORM instance for write endpoints."""
+    user = await get_user_by_id(db, current_user.id)
     if user is None:
-        raise credentials_exception
+        user_cache.invalidate(current_user.id)
+        raise _credentials_exception()
     return user
 
 
+# ---------------------------------------------------------------------------
+# Dependency – internal (service-to-service / admin) callers
+# ---------------------------------------------------------------------------
+async def require_service_key(api_key: str | None = Security(api_key_header)) -> None:
+    """Allow the request only with the configured ``X-API-Key`` (403 otherwise)."""
+    if not settings.INTERNAL_API_KEY or not api_key or not secrets.compare_digest(
+        api_key.encode("utf-8"), settings.INTERNAL_API_KEY.encode("utf-8"),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or missing API key",
+        )
+
+
 # ---------------------------------------------------------------------------
 # Public endpoints
 # ---------------------------------------------------------------------------
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
+async def register(request: Request, user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user account with optional user_type and proof_url."""
-    existing = await get_user_by_email(db, user_in.email)
-    if existing:
+    # Before bcrypt (and before the session checks out a connection)
+    await throttle.check(request, user_in.email)
+    user = await create_user(db, user_in)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    user = await create_user(db, user_in)
     return user
 
 
+def _access_token_for(user: User | UserSnapshot) -> str:
+    # Include user type in JWT claims for cinema pricing microservices
+    return create_access_token(data={
+        "sub": str(user.id),
+        "type": user.user_type.value if hasattr(user.user_type, 'value') else user.user_type,
+    })
+
+
+async def _rehash_in_background(
+    session_factory: async_sessionmaker, user_id: int, old_hash: str, password: str,
+) -> None:
+    """Re-hash a password at the configured bcrypt cost (runs after the response)."""
+    try:
+        new_hash = await get_password_hash_async(password)
+        async with session_factory() as db:
+            async with db.begin():
+                await rehash_password(db, user_id, old_hash, new_hash)
+    except Exception:
+        # Best effort: the next successful login tries again
+        logger.warning("password rehash failed for user %s", user_id, exc_info=True)
+
+
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    session_factory: async_sessionmaker = Depends(get_sessionmaker),
 ):
     """Authenticate via OAuth2 form (username=email) and return a JWT access token.
 
     The JWT payload includes the user's `type` (standard, etudiant, mineur, chomeur)
-    for downstream microservices to apply pricing rules.
+    for downstream microservices to apply pricing rules. A refresh token is
+    returned as well, so clients can renew through `/refresh` without bcrypt.
     """
-    user = await get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    await throttle.check(request, form_data.username)
+    # The read connection is handed back before the (slow) bcrypt verification
+    user = await _read_user(db, get_user_by_email, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    # Include user type in JWT claims for cinema pricing microservices
-    access_token = create_access_token(data={
-        "sub": str(user.id),
-        "type": user.user_type.value if hasattr(user.user_type, 'value') else user.user_type,
-    })
-    return Token(access_token=access_token)
+    if needs_rehash(user.hashed_password):
+        # BCRYPT_ROUNDS changed since this hash was made: upgrade it off the login path
+        background_tasks.add_task(
+            _rehash_in_background, session_factory, user.id, user.hashed_password, form_data.password,
+        )
+    async with session_factory() as write_db:
+        async with write_db.begin():
+            refresh_token = await issue_refresh_token(write_db, user.id)
+    return Token(access_token=_access_token_for(user), refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    body: RefreshRequest,
+    session_factory: async_sessionmaker = Depends(get_sessionmaker),
+):
+    """Exchange a refresh token for a new access token and the next refresh token.
+
+    Each refresh token is single-use. Replaying one that was already used
+    revokes its whole family and the user's outstanding access tokens.
+    """
+    user: User | UserSnapshot | None = None
+    # Committed before any error is raised, so a replay's family revocation sticks
+    async with session_factory() as db:
+        async with db.begin():
+            rotation = await rotate_refresh_token(db, body.refresh_token)
+            if rotation.token is not None:
+                user = user_cache.get(rotation.user_id) or await get_user_by_id(db, rotation.user_id)
+
+    if rotation.reused:
+        logger.warning("refresh token reuse detected for user %s", rotation.user_id)
+        revoke_subject(rotation.user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
+    return Token(access_token=_access_token_for(user), refresh_token=rotation.token)
 
 
 # ---------------------------------------------------------------------------
 # Protected endpoints
 # ---------------------------------------------------------------------------
-@router.get("/me", response_model=UserResponse)
-async def get_me(current_user=Depends(get_current_user)):
-    """Return the profile of the authenticated user (includes user_type & proof_url)."""
+def _user_etag(user: User | UserSnapshot) -> str:
+    """Strong ETag of a profile: changes with every write (``version``)."""
+    return strong_etag(user.id, user.version)
+
+
+def _precondition_failed(etag: Optional[str] = None) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Profile was modified by another request",
+        headers={"ETag": etag} if etag else None,
+    )
+
+
+# Per-user representation: never stored by shared caches, always revalidated
+_PROFILE_CACHE_CONTROL = "private, no-cache"
+
+
+@router.get("/me", response_model=UserResponse, responses={304: {"description": "Not Modified"}})
+async def get_me(
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """Return the profile of the authenticated user (includes user_type & proof_url).
+
+    Carries a strong ETag; a matching ``If-None-Match`` gets ``304`` with no
+    body. With the user cache warm that answer needs no database access.
+    """
+    etag = _user_etag(current_user)
+    headers = {"ETag": etag, "Cache-Control": _PROFILE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag, weak=True):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     return current_user
 
 
-@router.put("/me", response_model=UserResponse)
+@router.put("/me", response_model=UserResponse, responses={412: {"description": "Precondition Failed"}})
 async def update_me(
     user_in: UserUpdate,
-    current_user=Depends(get_current_user),
+    response: Response,
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    if_match: Optional[str] = Header(default=None),
 ):
-    """Update the authenticated user's profile (name, email, user_type, proof_url)."""
-    if user_in.email:
-        existing = await get_user_by_email(db, user_in.email)
-        if existing and existing.id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already in use",
-            )
-    updated = await update_user(db, current_user, user_in)
+    """Update the authenticated user's profile (name, email, user_type, proof_url).
+
+    Without ``If-Match`` the sent fields are simply written. With it, the
+    update only applies to the version the client saw (``UPDATE … WHERE
+    version = ?``, no row lock); any mismatch – before or during the update –
+    is a ``412``. The cached snapshot is never used as the expected version:
+    it may lag behind the primary.
+    """
+    changes = user_in.model_dump(exclude_unset=True)
+    expected_version = None
+    if if_match is not None:
+        stored = await get_user_by_id(db, current_user.id)
+        if stored is None:
+            raise _credentials_exception()
+        if not etag_matches(if_match, _user_etag(stored), weak=False):
+            raise _precondition_failed(_user_etag(stored))
+        expected_version = stored.version
+
+    try:
+        updated = await update_user(db, current_user.id, changes, expected_version=expected_version)
+    except VersionConflict:
+        raise _precondition_failed()
+    except IntegrityError as exc:
+        # Unique index on email: no read-then-write race with a concurrent signup
+        if not is_duplicate_email(exc):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already in use",
+        )
+    if updated is None:
+        raise _credentials_exception()
+    response.headers["ETag"] = _user_etag(updated)
     return updated
 
 
 @router.delete("/me", status_code=status.HTTP_200_OK)
 async def delete_me(
-    current_user=Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Delete the authenticated user's account."""
+    """Delete the authenticated user's account (and revoke its outstanding tokens)."""
     await delete_user(db, current_user)
+    revoke_subject(current_user.id)
     return {"detail": "User deleted successfully"}
 
 
@@ -127,7 +350,7 @@ async def delete_me(
 @router.post("/verify-type", response_model=UserResponse)
 async def verify_type(
     request: VerifyTypeRequest,
-    current_user=Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Submit proof to change user type (étudiant, mineur, chômeur).
@@ -135,8 +358,120 @@ async def verify_type(
     MVP: stores the proof URL and updates user_type immediately.
     Future: integrate with proof verification workflow.
     """
-    current_user.user_type = request.user_type
-    current_user.proof_url = request.proof_url
-    await db.flush()
-    await db.refresh(current_user)
-    return current_user
+    updated = await update_user(db, current_user.id, {
+        "user_type": request.user_type,
+        "proof_url": request.proof_url,
+    })
+    if updated is None:
+        raise _credentials_exception()
+    return updated
+
+
+# ---------------------------------------------------------------------------
+# Internal endpoints (X-API-Key)
+# ---------------------------------------------------------------------------
+@router.post(
+    "/batch",
+    response_model=UserBatchResponse,
+    dependencies=[Depends(require_service_key)],
+)
+async def batch_users(request: UserBatchRequest, db: AsyncSession = Depends(get_read_db)):
+    """Resolve many user ids in one query (service-to-service enrichment).
+
+    Users come back in request order (duplicates collapsed); unknown ids are
+    listed in ``missing``.
+    """
+    ids = list(dict.fromkeys(request.ids))
+    users = {user.id: user for user in await get_users_by_ids(db, ids)}
+    await db.close()
+    return UserBatchResponse(
+        users=[UserResponse.model_validate(users[i]) for i in ids if i in users],
+        missing=[i for i in ids if i not in users],
+    )
+
+
+@router.get("/export", dependencies=[Depends(require_service_key)])
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user_type: Optional[UserType] = None,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Stream every matching user as NDJSON or CSV (admin / reporting).
+
+    Rows are read through a server-side cursor and written out batch by batch,
+    so memory stays flat and the first byte is sent before the query ends.
+    ``created_from`` is inclusive, ``created_to`` exclusive.
+    """
+    result = await stream_users(
+        db,
+        user_type=user_type.value if user_type else None,
+        is_active=is_active,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    fields = [column.key for column in EXPORT_COLUMNS]
+    headers = {"Content-Disposition": f'attachment; filename="users.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        encode_rows(result.partitions(), fields, format, compress=gzip),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers,
+    )
+
+
+def _encode_cursor(user: User) -> str:
+    raw = json.dumps([user.created_at.isoformat(), user.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+_INT32_MAX = 2**31 - 1
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+        if not isinstance(decoded, list) or len(decoded) != 2:
+            raise invalid
+        created_at, user_id = decoded
+        # ``users.id`` is an INTEGER column: anything else could never match a row
+        if not isinstance(created_at, str) or type(user_id) is not int or not 0 < user_id <= _INT32_MAX:
+            raise invalid
+        return datetime.fromisoformat(created_at), user_id
+    except (ValueError, TypeError, OverflowError):
+        raise invalid
+
+
+@router.get("", response_model=UserPage, dependencies=[Depends(require_service_key)])
+async def list_users_page(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    user_type: Optional[UserType] = None,
+    is_active: Optional[bool] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Browse accounts newest first with keyset (cursor) pagination (admin).
+
+    Pass the returned ``next_cursor`` back to get the following page; it is
+    null on the last page.
+    """
+    users = await list_users(
+        db,
+        limit=limit + 1,
+        after=_decode_cursor(cursor) if cursor else None,
+        user_type=user_type.value if user_type else None,
+        is_active=is_active,
+    )
+    await db.close()
+    has_more = len(users) > limit
+    users = users[:limit]
+    return UserPage(
+        items=[UserResponse.model_validate(user) for user in users],
+        next_cursor=_encode_cursor(users[-1]) if has_more else None,
+    )
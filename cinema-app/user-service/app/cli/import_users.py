@@ -0,0 +1,229 @@
+"""
+Bulk user import – CSV / JSONL → users table.
+
+Usage::
+
+    python -m app.cli.import_users users.csv --checkpoint users.ckpt --errors users.errors.jsonl
+
+Rows are read as a stream, validated with ``UserCreate``, hashed across a
+process pool and written in batches: with ``COPY`` (asyncpg
+``copy_records_to_table``) on PostgreSQL, with a multi-row INSERT elsewhere
+(SQLite, for local testing). After every committed batch the last source line
+is written to the checkpoint file, so an interrupted run can be resumed with
+the same command. The exit status is 1 when any row was rejected.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.security import get_password_hash
+from app.crud.user import normalize_email
+from app.db.database import create_engine_from_settings, engine as default_engine
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+COPY_COLUMNS = (
+    "email", "hashed_password", "full_name", "is_active",
+    "user_type", "proof_url", "created_at", "updated_at",
+)
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import run."""
+    imported: int = 0
+    errors: int = 0
+    last_line: int = 0
+    error_rows: list[dict[str, Any]] = field(default_factory=list, repr=False)
+
+
+def iter_records(path: Path) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield ``(line_number, record)`` from a CSV (with header) or JSONL file."""
+    with path.open(newline="", encoding="utf-8") as fh:
+        if path.suffix.lower() in {".jsonl", ".ndjson"}:
+            for line_no, line in enumerate(fh, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except json.JSONDecodeError as exc:
+                        yield line_no, {"__error__": f"invalid JSON: {exc.msg}"}
+        else:
+            reader = csv.DictReader(fh)
+            for record in reader:
+                # Line of the record's last physical line (header is line 1)
+                yield reader.line_num, {k: v for k, v in record.items() if v not in ("", None)}
+
+
+def read_checkpoint(path: Optional[Path]) -> int:
+    """Last source line committed by a previous run (0 if none)."""
+    if path is None or not path.exists():
+        return 0
+    return int(path.read_text().strip() or 0)
+
+
+def write_checkpoint(path: Optional[Path], line_no: int) -> None:
+    """Atomically record ``line_no`` as committed."""
+    if path is None:
+        return
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(str(line_no))
+    os.replace(tmp, path)
+
+
+async def _existing_emails(conn: AsyncConnection, emails: list[str]) -> set[str]:
+    result = await conn.execute(select(User.email).where(User.email.in_(emails)))
+    return set(result.scalars())
+
+
+async def _write_batch(conn: AsyncConnection, rows: list[dict[str, Any]]) -> None:
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            User.__tablename__,
+            records=[tuple(row[c] for c in COPY_COLUMNS) for row in rows],
+            columns=COPY_COLUMNS,
+        )
+    else:
+        await conn.execute(insert(User), rows)
+
+
+async def import_users(
+    path: Path,
+    *,
+    engine: AsyncEngine = default_engine,
+    executor: Executor,
+    batch_size: int = 1000,
+    checkpoint: Optional[Path] = None,
+    errors_out: Optional[TextIO] = None,
+) -> ImportReport:
+    """Import ``path`` into the users table; see the module docstring."""
+    report = ImportReport(last_line=read_checkpoint(checkpoint))
+    resume_after = report.last_line
+    loop = asyncio.get_running_loop()
+
+    def record_error(line_no: int, email: Any, error: str) -> None:
+        report.errors += 1
+        row = {"line": line_no, "email": email, "error": error}
+        report.error_rows.append(row)
+        if errors_out is not None:
+            errors_out.write(json.dumps(row) + "\n")
+
+    async def flush(batch: list[tuple[int, UserCreate]], last_line: int) -> None:
+        # 1. drop emails already in the table or repeated within the batch
+        emails = [normalize_email(user.email) for _, user in batch]
+        taken: set[str] = set()
+        if emails:
+            async with engine.connect() as conn:
+                taken = await _existing_emails(conn, emails)
+        pending = []
+        for (line_no, user), email in zip(batch, emails):
+            if email in taken:
+                record_error(line_no, email, "email already registered")
+                continue
+            taken.add(email)
+            pending.append((user, email))
+
+        # 2. hash across the pool without holding a DB connection
+        hashes = await asyncio.gather(*(
+            loop.run_in_executor(executor, get_password_hash, user.password)
+            for user, _ in pending
+        ))
+
+        # 3. write + commit, then advance the checkpoint
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "email": email,
+                "hashed_password": hashed,
+                "full_name": user.full_name,
+                "is_active": True,
+                "user_type": user.user_type.value,
+                "proof_url": user.proof_url,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (user, email), hashed in zip(pending, hashes)
+        ]
+        if rows:
+            async with engine.connect() as conn:
+                await _write_batch(conn, rows)
+                await conn.commit()
+        report.imported += len(rows)
+        report.last_line = last_line
+        write_checkpoint(checkpoint, last_line)
+
+    batch: list[tuple[int, UserCreate]] = []
+    last_line = resume_after
+    for line_no, record in iter_records(path):
+        if line_no <= resume_after:
+            continue
+        last_line = line_no
+        if "__error__" in record:
+            record_error(line_no, None, record["__error__"])
+            continue
+        try:
+            batch.append((line_no, UserCreate(**record)))
+        except ValidationError as exc:
+            record_error(line_no, record.get("email"), "; ".join(
+                f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()
+            ))
+            continue
+        if len(batch) >= batch_size:
+            await flush(batch, last_line)
+            batch = []
+    if batch or last_line > report.last_line:
+        await flush(batch, last_line)
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-import users from CSV or JSONL.")
+    parser.add_argument("path", type=Path, help="CSV (with header) or .jsonl/.ndjson file")
+    parser.add_argument("--database-url", help="override DATABASE_URL")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="hashing processes")
+    parser.add_argument("--checkpoint", type=Path, help="resume file (created/updated per batch)")
+    parser.add_argument("--errors", type=Path, help="write rejected rows here as JSONL")
+    args = parser.parse_args(argv)
+
+    async def run() -> ImportReport:
+        target = create_engine_from_settings(args.database_url) if args.database_url else default_engine
+        errors_out = args.errors.open("a", encoding="utf-8") if args.errors else None
+        try:
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                return await import_users(
+                    args.path,
+                    engine=target,
+                    executor=executor,
+                    batch_size=args.batch_size,
+                    checkpoint=args.checkpoint,
+                    errors_out=errors_out,
+                )
+        finally:
+            if errors_out is not None:
+                errors_out.close()
+            await target.dispose()
+
+    report = asyncio.run(run())
+    print(
+        f"imported={report.imported} errors={report.errors} last_line={report.last_line}",
+        file=sys.stderr,
+    )
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+In-process caches – bounded LRU + TTL cache and the authenticated-user cache.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.user import UserSnapshot
+
+
+class LRUTTLCache:
+    """Bounded mapping with least-recently-used eviction and per-entry expiry.
+
+    Not thread-safe by design: it is only touched from the event loop.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on miss / expiry."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Insert or replace a value, evicting the least recently used entry if full.
+
+        ``ttl`` shortens the lifetime of this entry (it never extends ``self.ttl``).
+        """
+        if not self.enabled:
+            return
+        lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+        if lifetime <= 0:
+            return
+        self._data[key] = (self._clock() + lifetime, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        self._data.clear()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and current size."""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Authenticated-user cache (UserSnapshot keyed by user id)
+# ---------------------------------------------------------------------------
+user_cache = LRUTTLCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+for _counter in ("hits", "misses", "evictions"):
+    registry.gauge(
+        f"user_cache_{_counter}", f"Authenticated-user cache {_counter}.",
+        function=lambda counter=_counter: getattr(user_cache, counter),
+    )
+
+# ---------------------------------------------------------------------------
+# Verified-token cache (decoded JWT claims keyed by SHA-256 of the token)
+# ---------------------------------------------------------------------------
+token_cache = LRUTTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+for _counter in ("hits", "misses", "evictions"):
+    registry.gauge(
+        f"token_cache_{_counter}", f"Verified-token cache {_counter}.",
+        function=lambda counter=_counter: getattr(token_cache, counter),
+    )
+
+_PENDING_WRITES = "user_cache_pending_writes"
+
+
+def _pending_writes(db: AsyncSession) -> dict[int, Optional[UserSnapshot]]:
+    return db.info.setdefault(_PENDING_WRITES, {})
+
+
+def invalidate_user(db: AsyncSession, user_id: int) -> None:
+    """Evict a user now and again once ``db``'s transaction ends.
+
+    The second eviction drops any stale snapshot a concurrent reader may have
+    cached between our write and the commit becoming visible.
+    """
+    user_cache.invalidate(user_id)
+    _pending_writes(db)[user_id] = None
+
+
+def cache_user_on_commit(db: AsyncSession, snapshot: UserSnapshot) -> None:
+    """Evict a user now and cache ``snapshot`` once ``db`` commits.
+
+    Used by write paths that already hold the fresh row (``UPDATE … RETURNING``);
+    on rollback the entry is simply evicted.
+    """
+    user_cache.invalidate(snapshot.id)
+    _pending_writes(db)[snapshot.id] = snapshot
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_writes(session: Session) -> None:
+    for user_id, snapshot in session.info.pop(_PENDING_WRITES, {}).items():
+        if snapshot is None:
+            user_cache.invalidate(user_id)
+        else:
+            user_cache.set(user_id, snapshot)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_writes(session: Session, previous_transaction: Any) -> None:
+    for user_id in session.info.pop(_PENDING_WRITES, {}):
+        user_cache.invalidate(user_id)
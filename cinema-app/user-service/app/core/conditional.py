@@ -0,0 +1,34 @@
+"""
+Conditional requests (RFC 9110 §13) – entity tags, ``If-None-Match`` and ``If-Match``.
+"""
+
+import hashlib
+from typing import Any, Optional
+
+
+def strong_etag(*parts: Any) -> str:
+    """Quoted strong ETag identifying ``parts`` (same parts, same tag)."""
+    digest = hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header: Optional[str], etag: str, *, weak: bool) -> bool:
+    """True if the ``If-None-Match`` / ``If-Match`` value ``header`` lists ``etag`` (or ``*``).
+
+    ``If-None-Match`` uses the weak comparison (a ``W/`` prefix is ignored);
+    ``If-Match`` the strong one, where weak tags never match.
+    """
+    if not header:
+        return False
+    for tag in (t.strip() for t in header.split(",")):
+        if tag == "*":
+            return True
+        if weak and _opaque(tag) == _opaque(etag):
+            return True
+        if not weak and tag == etag and not tag.startswith("W/"):
+            return True
+    return False
@@ -2,6 +2,8 @@
 Application configuration loaded from environment variables via pydantic-settings.
 """
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -14,12 +16,85 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "postgresql+asyncpg://cinema:cinema_secret_2024@db:5432/cinema_users"
 
+    # Read replicas (comma-separated URLs; empty = read from the primary)
+    DATABASE_REPLICA_URLS: str = ""
+    DATABASE_REPLICA_EJECT_SECONDS: float = 30.0
+
+    # Connection pool (per worker process) & asyncpg statement caches
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
     # JWT
     SECRET_KEY: str = "CHANGE_ME_IN_PRODUCTION"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: float = 3600.0  # 0 = no periodic purge
+
+    # Asymmetric JWT (ALGORITHM=RS256/ES256): PEM private key + extra accepted public keys
+    JWT_PRIVATE_KEY_PATH: str = ""
+    JWT_PUBLIC_KEY_PATHS: str = ""
+    JWKS_MAX_AGE_SECONDS: int = 300
+
+    # Service-to-service / admin endpoints (X-API-Key header; empty = disabled)
+    INTERNAL_API_KEY: str = ""
+    USER_BATCH_MAX_IDS: int = 1000
+
+    # bcrypt cost (BCRYPT_TARGET_MS > 0 = calibrate the cost at startup to that hash latency)
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: float = 0.0
+
+    # Login / register throttling (token buckets per client IP and per email)
+    THROTTLE_ENABLED: bool = True
+    THROTTLE_BACKEND: str = "memory"
+    THROTTLE_IP_BURST: int = 20
+    THROTTLE_IP_PER_MINUTE: float = 10.0
+    THROTTLE_EMAIL_BURST: int = 5
+    THROTTLE_EMAIL_PER_MINUTE: float = 2.0
+    THROTTLE_TRUST_FORWARDED_FOR: bool = False
+
+    # Password hashing worker pool ("thread" or "process"; 0 workers = CPU count)
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Authenticated-user cache (0 entries = disabled)
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Concurrent identical user lookups (by id / email) share one query
+    USER_LOOKUP_COALESCING: bool = True
+
+    # Verified-token cache – decoded claims kept until the token's exp (0 = disabled)
+    TOKEN_CACHE_SIZE: int = 10_000
+
+    # Load shedding (503 for low-priority routes; thresholds = level 1, twice = level 2)
+    SHED_ENABLED: bool = True
+    SHED_LOOP_LAG_MS: float = 100.0
+    SHED_POOL_WAIT_MS: float = 250.0
+    SHED_MAX_IN_FLIGHT: int = 256
+    SHED_HALF_LIFE_SECONDS: float = 2.0
+
+    # Observability (Server-Timing response header, slow SQL warnings; 0 ms = log every statement)
+    SERVER_TIMING_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
+    @property
+    def database_replica_urls(self) -> list[str]:
+        """DATABASE_REPLICA_URLS split into a list."""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+    @property
+    def jwt_public_key_paths(self) -> list[str]:
+        """JWT_PUBLIC_KEY_PATHS split into a list."""
+        return [path.strip() for path in self.JWT_PUBLIC_KEY_PATHS.split(",") if path.strip()]
+
 
 settings = Settings()
@@ -0,0 +1,69 @@
+"""
+Streaming encoders for bulk exports (NDJSON / CSV, optional gzip).
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, Sequence
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _encode_ndjson(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> str:
+    return "".join(
+        json.dumps(dict(zip(fields, row)), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows: Iterable[Sequence[Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def encode_rows(
+    partitions: AsyncIterator[Sequence[Sequence[Any]]],
+    fields: Sequence[str],
+    fmt: str,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """Encode row batches as NDJSON or CSV chunks, gzip-compressed on request.
+
+    The CSV header (if any) is yielded before the first batch is fetched, so
+    the first byte leaves as soon as the query has started.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip container
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        if compressor is None:
+            return data
+        # Sync-flush each chunk so compressed output streams instead of buffering
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if fmt == "csv":
+        yield emit(_encode_csv([fields]))
+    async for batch in partitions:
+        chunk = _encode_csv(batch) if fmt == "csv" else _encode_ndjson(fields, batch)
+        data = emit(chunk)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,111 @@
+"""
+JWT key ring – signing key, accepted verification keys and the public JWKS.
+
+With ``ALGORITHM=HS256`` (default) tokens are signed with ``SECRET_KEY`` and
+no JWKS is published. With RS*/ES* the current private key signs every token
+with a ``kid`` header (RFC 7638 thumbprint), and ``JWT_PUBLIC_KEY_PATHS`` lists
+extra public keys still accepted – the previous key during a rotation, or the
+next one published ahead of time. Other services verify tokens locally with
+``GET /.well-known/jwks.json``.
+
+Keys are parsed once (``jwk.construct``): python-jose otherwise re-parses a
+PEM string on every sign / verify call.
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from jose import jwk
+from jose.backends.base import Key
+
+from app.core.config import Settings, settings
+
+ASYMMETRIC_PREFIXES = ("RS", "PS", "ES")
+
+# RFC 7638 – members hashed for the thumbprint, per key type
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+def jwk_thumbprint(public_jwk: dict[str, Any]) -> str:
+    """RFC 7638 SHA-256 thumbprint of a public JWK, base64url without padding."""
+    members = {k: public_jwk[k] for k in _THUMBPRINT_MEMBERS[public_jwk["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(canonical).digest()).rstrip(b"=").decode()
+
+
+@dataclass(frozen=True)
+class VerificationKey:
+    """A public key accepted for verification, with its published JWK."""
+    kid: str
+    key: Key
+    jwk: dict[str, Any]
+
+
+class KeyRing:
+    """Signing key plus every key ``decode_access_token`` accepts."""
+
+    def __init__(
+        self,
+        algorithm: str,
+        *,
+        secret: str = "",
+        private_pem: Optional[str] = None,
+        public_pems: tuple[str, ...] = (),
+    ):
+        self.algorithm = algorithm
+        self.asymmetric = algorithm.startswith(ASYMMETRIC_PREFIXES)
+        self._keys: dict[str, VerificationKey] = {}
+        self.signing_kid: Optional[str] = None
+
+        if not self.asymmetric:
+            if not algorithm.startswith("HS"):
+                raise ValueError(f"unsupported JWT algorithm {algorithm!r}")
+            self.signing_key: Any = secret
+        else:
+            if not private_pem:
+                raise ValueError(f"{algorithm} requires JWT_PRIVATE_KEY_PATH")
+            self.signing_key = jwk.construct(private_pem, algorithm)
+            self.signing_kid = self._add(self.signing_key.public_key())
+            for pem in public_pems:
+                self._add(jwk.construct(pem, algorithm))
+
+        self.jwks = {"keys": [k.jwk for k in self._keys.values()]}
+        self.jwks_json = json.dumps(self.jwks, separators=(",", ":")).encode()
+        self.jwks_etag = '"' + hashlib.sha256(self.jwks_json).hexdigest()[:32] + '"'
+
+    def _add(self, public_key: Key) -> str:
+        public_jwk = public_key.to_dict()
+        kid = jwk_thumbprint(public_jwk)
+        self._keys[kid] = VerificationKey(kid, public_key, {**public_jwk, "kid": kid, "use": "sig"})
+        return kid
+
+    @property
+    def headers(self) -> Optional[dict[str, str]]:
+        """Extra JWT headers for newly signed tokens."""
+        return {"kid": self.signing_kid} if self.signing_kid else None
+
+    def verification_key(self, kid: Optional[str]) -> Optional[Any]:
+        """Key for a token's ``kid`` header (the shared secret for HS*), or None."""
+        if not self.asymmetric:
+            return self.signing_key
+        entry = self._keys.get(kid) if kid else None
+        return entry.key if entry else None
+
+    @classmethod
+    def from_settings(cls, config: Settings) -> "KeyRing":
+        def read(path: str) -> str:
+            return Path(path).read_text()
+
+        return cls(
+            config.ALGORITHM,
+            secret=config.SECRET_KEY,
+            private_pem=read(config.JWT_PRIVATE_KEY_PATH) if config.JWT_PRIVATE_KEY_PATH else None,
+            public_pems=tuple(read(p) for p in config.jwt_public_key_paths),
+        )
+
+
+keyring = KeyRing.from_settings(settings)
@@ -0,0 +1,313 @@
+"""
+Lightweight Prometheus-style metrics – counters, gauges, histograms, ASGI middleware.
+
+Everything lives in process memory and is rendered in the Prometheus text
+exposition format on ``GET /metrics``. Recording a sample is a dict lookup and
+a ``bisect``, so the middleware adds microseconds per request.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from app.core.config import settings
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+# Seconds – tuned for API latencies (sub-ms cache hits up to multi-second bcrypt queues)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> list[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set (name it ``*_total``)."""
+    type_name = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[Sample]:
+        return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (optionally computed at scrape time)."""
+    type_name = "gauge"
+
+    def __init__(self, *args: Any, function: Optional[Callable[[], float]] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelValues, float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[Sample]:
+        if self._function is not None:
+            return [(self.name, {}, self._function())]
+        return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set."""
+    type_name = "histogram"
+
+    def __init__(self, *args: Any, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> list[Sample]:
+        out: list[Sample] = []
+        for key, (counts, total) in self._series.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                out.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            out.append((f"{self.name}_sum", labels, total[0]))
+            out.append((f"{self.name}_count", labels, cumulative))
+        return out
+
+
+class Registry:
+    """Holds metrics and scrape-time collectors; renders the text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs: Any) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, **kwargs))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs: Any) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, **kwargs))
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]) -> None:
+        """Register a callable returning freshly built metrics at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ---------------------------------------------------------------------------
+# Service metrics
+# ---------------------------------------------------------------------------
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.",
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.", ("route",),
+    buckets=COUNT_BUCKETS,
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request.", ("route",),
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Duration of individual SQL statements.",
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt time in the worker pool.", ("op",),
+)
+password_hash_queue = registry.histogram(
+    "password_hash_queue_seconds", "Time bcrypt calls waited for a pool worker.", ("op",),
+)
+jwt_duration = registry.histogram(
+    "jwt_duration_seconds", "JWT encode / decode time.", ("op",),
+)
+
+
+# ---------------------------------------------------------------------------
+# Per-request accounting (shared with DB / security hooks via a contextvar)
+# ---------------------------------------------------------------------------
+def _route_label(scope: dict[str, Any]) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """Mutable per-request counters filled in by instrumentation hooks."""
+    scope: dict[str, Any]
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    hash_seconds: float = 0.0
+
+    @property
+    def endpoint(self) -> str:
+        """``METHOD /route/template`` of the request (once routing has run)."""
+        return f"{self.scope.get('method', '')} {_route_label(self.scope)}"
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Render a ``Server-Timing`` header value (durations in ms)."""
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"']
+        if self.hash_seconds:
+            parts.append(f"hash;dur={self.hash_seconds * 1000:.1f}")
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def record_query(seconds: float) -> None:
+    """Record one SQL statement (called from the engine event hooks)."""
+    db_query_duration.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += seconds
+
+
+def record_hash(seconds: float) -> None:
+    """Attribute bcrypt worker time to the current request."""
+    stats = current_request.get()
+    if stats is not None:
+        stats.hash_seconds += seconds
+
+
+def current_endpoint() -> str:
+    """Endpoint of the request being served, or ``-`` outside a request."""
+    stats = current_request.get()
+    return stats.endpoint if stats is not None else "-"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, in-flight and per-request DB time.
+
+    Also adds a ``Server-Timing`` header (DB, bcrypt and total time up to the
+    response start) so the breakdown shows up in browser devtools.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    timing = stats.server_timing(time.perf_counter() - start)
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        (b"server-timing", timing.encode("latin-1")),
+                    ]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            current_request.reset(token)
+            route = _route_label(scope)
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"], route=route, status=status_code,
+            )
+            http_request_db_queries.observe(stats.db_queries, route=route)
+            http_request_db_seconds.observe(stats.db_seconds, route=route)
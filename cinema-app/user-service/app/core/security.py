@@ -2,13 +2,26 @@
 Security utilities – JWT token management & password hashing.
 """
 
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import bcrypt
 from jose import JWTError, jwt
 
+from app.core import keys
+from app.core.cache import token_cache
 from app.core.config import settings
+from app.core.metrics import (
+    jwt_duration, password_hash_duration, password_hash_queue, record_hash, registry,
+)
+
+logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Password hashing (bcrypt – direct usage for bcrypt 4.x compat)
@@ -23,31 +36,253 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-def get_password_hash(password: str) -> str:
-    """Return the bcrypt hash of a plain-text password."""
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Return the bcrypt hash of a plain-text password (``BCRYPT_ROUNDS`` cost by default)."""
     return bcrypt.hashpw(
         password.encode("utf-8"),
-        bcrypt.gensalt(),
+        bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS),
     ).decode("utf-8")
 
 
+def password_hash_rounds(hashed_password: str) -> int:
+    """Cost factor encoded in a ``$2b$NN$…`` hash."""
+    return int(hashed_password.split("$")[2])
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash was made with a cost other than ``BCRYPT_ROUNDS``."""
+    try:
+        return password_hash_rounds(hashed_password) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """Largest cost in ``[min_rounds, max_rounds]`` hashing within ``target_ms`` on this host.
+
+    The hash is timed at ``min_rounds`` (best of three); each extra round
+    doubles the work, so higher costs are extrapolated rather than measured.
+    """
+    password = b"bcrypt-calibration"
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        bcrypt.hashpw(password, bcrypt.gensalt(min_rounds))
+        samples.append(time.perf_counter() - start)
+    base_ms = min(samples) * 1000
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+
+# ---------------------------------------------------------------------------
+# Async password hashing (bounded worker pool, keeps the event loop free)
+# ---------------------------------------------------------------------------
+class PasswordHashPoolBusy(RuntimeError):
+    """Raised when too many hash/verify calls are already queued."""
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    """Run ``fn`` in the worker and return ``(result, seconds spent)``."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHashPool:
+    """Runs bcrypt calls in a thread or process pool with a queue depth limit.
+
+    bcrypt releases the GIL, so the default thread pool already scales with
+    cores; a process pool is available for interpreters where it does not.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 0, max_queue: int = 64):
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._stats: dict[str, dict[str, float]] = {}
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt",
+                )
+        return self._executor
+
+    async def run(self, op: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Execute ``fn(*args)`` in the pool, recording timing under ``op``."""
+        if self._pending >= self.max_queue:
+            self.rejected += 1
+            raise PasswordHashPoolBusy(f"password {op} queue is full ({self.max_queue})")
+
+        self._pending += 1
+        queued_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(
+                self._get_executor(), _timed_call, fn, *args,
+            )
+        finally:
+            self._pending -= 1
+
+        total_seconds = time.perf_counter() - queued_at
+        self._record(op, run_seconds, total_seconds)
+        return result
+
+    def _record(self, op: str, run_seconds: float, total_seconds: float) -> None:
+        stats = self._stats.setdefault(
+            op, {"calls": 0, "run_seconds": 0.0, "wait_seconds": 0.0, "max_seconds": 0.0},
+        )
+        stats["calls"] += 1
+        stats["run_seconds"] += run_seconds
+        stats["wait_seconds"] += max(total_seconds - run_seconds, 0.0)
+        stats["max_seconds"] = max(stats["max_seconds"], total_seconds)
+        password_hash_duration.observe(run_seconds, op=op)
+        password_hash_queue.observe(max(total_seconds - run_seconds, 0.0), op=op)
+        record_hash(total_seconds)
+        logger.debug(
+            "password %s took %.1f ms (%.1f ms queued)",
+            op, run_seconds * 1000, (total_seconds - run_seconds) * 1000,
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently queued or running."""
+        return self._pending
+
+    def stats(self) -> dict[str, Any]:
+        """Return a snapshot of per-operation timing counters."""
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "ops": {op: dict(values) for op, values in self._stats.items()},
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (it is recreated lazily on next use)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+registry.gauge(
+    "password_hash_pending", "bcrypt calls queued or running.",
+    function=lambda: password_hash_pool.pending,
+)
+registry.gauge(
+    "password_hash_rejected", "bcrypt calls rejected because the queue was full.",
+    function=lambda: password_hash_pool.rejected,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Async ``verify_password`` – runs in the hashing pool."""
+    return await password_hash_pool.run("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Async ``get_password_hash`` – runs in the hashing pool."""
+    # Pass the cost explicitly: process workers don't see a calibrated value
+    return await password_hash_pool.run("hash", get_password_hash, password, settings.BCRYPT_ROUNDS)
+
+
 # ---------------------------------------------------------------------------
 # JWT tokens
 # ---------------------------------------------------------------------------
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a signed JWT with an expiry claim."""
+    """Create a signed JWT with an expiry claim (and a ``kid`` header for RS*/ES*).
+
+    ``iat`` keeps microseconds (a NumericDate may be fractional), so a token
+    issued right after a revocation is not caught by it.
+    """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (
-        expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": now.timestamp()})
+    start = time.perf_counter()
+    keyring = keys.keyring
+    token = jwt.encode(to_encode, keyring.signing_key, algorithm=keyring.algorithm, headers=keyring.headers)
+    jwt_duration.observe(time.perf_counter() - start, op="encode")
+    return token
 
 
-def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and validate a JWT. Returns payload dict or None."""
+def _verify_token(token: str) -> Optional[dict]:
+    start = time.perf_counter()
+    keyring = keys.keyring
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        key = keyring.verification_key(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return None
+        payload = jwt.decode(token, key, algorithms=[keyring.algorithm])
         return payload
     except JWTError:
         return None
+    finally:
+        jwt_duration.observe(time.perf_counter() - start, op="decode")
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode and validate a JWT. Returns payload dict or None.
+
+    Any key in the key ring is accepted, selected by the token's ``kid``.
+    Verified claims are cached by token digest until ``exp``; expiry,
+    revocation and the key ring that verified them are re-checked on every
+    hit. Treat the returned dict as read-only – it is shared between requests.
+    """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(cache_key)
+    if cached is not None and cached[0] is keys.keyring:
+        payload = cached[1]
+        if payload.get("exp", 0) <= time.time():
+            token_cache.invalidate(cache_key)
+            return None
+    else:
+        payload = _verify_token(token)
+        if payload is None:
+            return None
+        token_cache.set(cache_key, (keys.keyring, payload), ttl=payload.get("exp", 0) - time.time())
+    if is_revoked(payload):
+        return None
+    return payload
+
+
+# ---------------------------------------------------------------------------
+# Revocation by subject ("log out everywhere")
+# ---------------------------------------------------------------------------
+# Process-local: with several workers each one must be told (or rely on the
+# short access-token lifetime).
+_revoked_subjects: dict[str, float] = {}
+
+
+def revoke_subject(sub: Any) -> None:
+    """Reject every token issued to ``sub`` up to now (sub-second precision)."""
+    now = time.time()
+    horizon = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    for stale in [s for s, at in _revoked_subjects.items() if at < horizon]:
+        del _revoked_subjects[stale]
+    _revoked_subjects[str(sub)] = now
+
+
+def is_revoked(payload: dict) -> bool:
+    """True if the token's subject was revoked at or after its ``iat``."""
+    revoked_at = _revoked_subjects.get(str(payload.get("sub")))
+    return revoked_at is not None and payload.get("iat", 0) <= revoked_at
+
+
+def clear_revocations() -> None:
+    """Forget every revocation (tests)."""
+    _revoked_subjects.clear()
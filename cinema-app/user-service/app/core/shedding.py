@@ -0,0 +1,168 @@
+"""
+Adaptive load shedding – reject low-priority requests early when the service is saturated.
+
+Three signals are tracked: event-loop lag (sampled by a background task),
+connection-pool checkout wait (fed by ``InstrumentedQueuePool``) and
+in-flight requests. Each is compared to its ``SHED_*`` threshold; the worst
+ratio gives the pressure level:
+
+* ``< 1``  – everything is admitted;
+* ``>= 1`` – ``LOW`` routes (registration, export, admin listing) get 503;
+* ``>= 2`` – ``NORMAL`` routes are shed too; ``/me``, token refresh and
+  service lookups keep being served, health / metrics are never shed.
+
+The latency signals decay toward zero with ``SHED_HALF_LIFE_SECONDS`` when
+no new samples arrive, so the service recovers by itself once shedding has
+drained the queues.
+"""
+
+import asyncio
+import enum
+import json
+import time
+from typing import Callable
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+class Priority(enum.IntEnum):
+    """Lower value = shed later."""
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+ROUTE_PRIORITIES: dict[tuple[str, str], Priority] = {
+    ("GET", "/health"): Priority.CRITICAL,
+    ("GET", "/health/pool"): Priority.CRITICAL,
+    ("GET", "/metrics"): Priority.CRITICAL,
+    ("GET", "/.well-known/jwks.json"): Priority.CRITICAL,
+    ("GET", "/api/v1/users/me"): Priority.HIGH,
+    ("POST", "/api/v1/users/refresh"): Priority.HIGH,
+    ("POST", "/api/v1/users/batch"): Priority.HIGH,
+    ("POST", "/api/v1/users/register"): Priority.LOW,
+    ("GET", "/api/v1/users/export"): Priority.LOW,
+    ("GET", "/api/v1/users"): Priority.LOW,
+}
+
+
+def route_priority(method: str, path: str) -> Priority:
+    """Priority of a request (``NORMAL`` for anything not listed)."""
+    return ROUTE_PRIORITIES.get((method, path.rstrip("/") or "/"), Priority.NORMAL)
+
+
+class DecayingAverage:
+    """Moving average of samples that also decays toward 0 while idle."""
+
+    def __init__(self, half_life: float, alpha: float = 0.2, clock: Callable[[], float] = time.monotonic):
+        self.half_life = half_life
+        self.alpha = alpha
+        self._clock = clock
+        self._value = 0.0
+        self._updated = clock()
+
+    def _decay(self) -> None:
+        now = self._clock()
+        if now > self._updated:
+            self._value *= 0.5 ** ((now - self._updated) / self.half_life)
+            self._updated = now
+
+    def observe(self, sample: float) -> None:
+        self._decay()
+        self._value += (sample - self._value) * self.alpha
+
+    @property
+    def value(self) -> float:
+        self._decay()
+        return self._value
+
+
+# Lowest priority still served at each pressure level
+_LOWEST_ADMITTED = {0: Priority.LOW, 1: Priority.NORMAL, 2: Priority.HIGH}
+
+
+class LoadShedder:
+    """Holds the pressure signals and decides what to admit."""
+
+    def __init__(self):
+        self.loop_lag = DecayingAverage(settings.SHED_HALF_LIFE_SECONDS)
+        self.pool_wait = DecayingAverage(settings.SHED_HALF_LIFE_SECONDS)
+        self.in_flight = 0
+
+    def pressure(self) -> float:
+        """Worst signal / threshold ratio."""
+        return max(
+            self.loop_lag.value * 1000 / settings.SHED_LOOP_LAG_MS,
+            self.pool_wait.value * 1000 / settings.SHED_POOL_WAIT_MS,
+            self.in_flight / settings.SHED_MAX_IN_FLIGHT,
+        )
+
+    def level(self) -> int:
+        """0 = healthy, 1 = shedding LOW, 2 = shedding NORMAL and LOW."""
+        pressure = self.pressure()
+        return 2 if pressure >= 2 else 1 if pressure >= 1 else 0
+
+    def admit(self, priority: Priority) -> bool:
+        if not settings.SHED_ENABLED or priority is Priority.CRITICAL:
+            return True
+        return priority <= _LOWEST_ADMITTED[self.level()]
+
+
+load_shedder = LoadShedder()
+
+requests_shed = registry.counter(
+    "http_requests_shed_total", "Requests rejected with 503 by the load shedder.", ("priority",),
+)
+registry.gauge("load_shedding_level", "0 healthy, 1 shedding low, 2 shedding normal+low.",
+               function=load_shedder.level)
+registry.gauge("event_loop_lag_seconds", "Recent event-loop scheduling lag.",
+               function=lambda: load_shedder.loop_lag.value)
+registry.gauge("db_pool_wait_recent_seconds", "Recent connection-pool checkout wait.",
+               function=lambda: load_shedder.pool_wait.value)
+
+
+async def monitor_loop_lag(shedder: LoadShedder = load_shedder, interval: float = 0.1) -> None:
+    """Sample how late ``asyncio.sleep(interval)`` wakes up, forever."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        shedder.loop_lag.observe(max(time.perf_counter() - start - interval, 0.0))
+
+
+_SHED_BODY = json.dumps({"detail": "Service overloaded, please retry"}).encode()
+
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware answering 503 for requests the shedder does not admit."""
+
+    def __init__(self, app, shedder: LoadShedder = load_shedder):
+        self.app = app
+        self.shedder = shedder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = route_priority(scope["method"], scope["path"])
+        if not self.shedder.admit(priority):
+            requests_shed.inc(priority=priority.name.lower())
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_SHED_BODY)).encode()),
+                    (b"retry-after", b"1"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _SHED_BODY})
+            return
+
+        self.shedder.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.in_flight -= 1
@@ -0,0 +1,66 @@
+"""
+Single-flight request coalescing – concurrent calls for the same key share one execution.
+
+The first caller for a key starts the work as its own task; callers arriving
+while it runs wait on that task instead of starting another. Everyone gets
+the same result, or the same exception. A caller that is cancelled stops
+waiting without disturbing the others; the work itself is only cancelled
+once nobody is waiting for it any more. Nothing is remembered after the task
+finishes – this is not a cache.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.core.metrics import registry
+
+coalesced_calls = registry.counter(
+    "singleflight_coalesced_total", "Calls served by another caller's in-flight execution.", ("name",),
+)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent ``do(key, fn)`` calls. Only touched from the event loop."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _land(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            flight.task.exception()  # retrieved here even if every waiter left
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await fn()``, sharing a call already in flight for ``key``."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._land(key, flight))
+        else:
+            coalesced_calls.inc(name=self.name)
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Last one out: late callers must not join a flight being cancelled
+                self._flights.pop(key, None)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
@@ -0,0 +1,163 @@
+"""
+Login / registration throttling – token buckets keyed by client IP and email.
+
+Checked before any bcrypt work, so a credential-stuffing client is turned
+away with ``429`` for the price of a dict lookup. The default backend keeps
+buckets in process memory; set ``THROTTLE_BACKEND=package.module:factory``
+to share limits across workers (the factory returns a ``ThrottleBackend``).
+"""
+
+import importlib
+import math
+import time
+from typing import Callable, Optional, Protocol
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+auth_throttled = registry.counter(
+    "auth_throttled_total", "Login / register attempts rejected by the throttle.", ("scope",),
+)
+
+
+class Throttled(Exception):
+    """Raised when a bucket is empty; ``retry_after`` is in seconds."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class ThrottleBackend(Protocol):
+    """Storage for token buckets."""
+
+    async def hit(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token from ``key``'s bucket.
+
+        ``rate`` is in tokens per second. Returns 0 when allowed, otherwise the
+        seconds until a token will be available.
+        """
+        ...
+
+
+class MemoryBackend:
+    """In-process token buckets with timing-wheel expiry.
+
+    A bucket that has refilled completely is indistinguishable from a missing
+    one, so it is dropped: each bucket is filed in the wheel slot of the tick
+    at which it will be full, and slots are swept as time passes. Memory stays
+    proportional to the clients seen in the last refill period. Buckets live
+    in this worker only, so each worker enforces the limit on its own.
+    """
+
+    def __init__(self, *, slots: int = 256, tick: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._tick = tick
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: dict[str, list[float]] = {}
+        self._wheel: list[set[str]] = [set() for _ in range(slots)]
+        self._cursor = int(clock() / tick)
+
+    def _slot(self, at: float) -> int:
+        return int(at / self._tick) % len(self._wheel)
+
+    def _sweep(self, now: float) -> None:
+        current = int(now / self._tick)
+        # Past a full revolution every slot has been visited once
+        for tick in range(max(self._cursor + 1, current - len(self._wheel) + 1), current + 1):
+            index = tick % len(self._wheel)
+            slot = self._wheel[index]
+            if not slot:
+                continue
+            keep = set()
+            for key in slot:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                if bucket[2] <= now:
+                    del self._buckets[key]
+                elif self._slot(bucket[2]) == index:
+                    keep.add(key)  # due on a later revolution
+            self._wheel[index] = keep
+        self._cursor = max(self._cursor, current)
+
+    async def hit(self, key: str, capacity: float, rate: float) -> float:
+        now = self._clock()
+        self._sweep(now)
+        bucket = self._buckets.get(key)
+        tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        tokens -= 1
+        full_at = now + (capacity - tokens) / rate
+        self._buckets[key] = [tokens, now, full_at]
+        self._wheel[self._slot(full_at)].add(key)
+        return 0.0
+
+    def clear(self) -> None:
+        """Drop every bucket."""
+        self._buckets.clear()
+        for slot in self._wheel:
+            slot.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def load_backend(spec: str) -> ThrottleBackend:
+    """``memory`` or a ``package.module:factory`` returning a backend."""
+    if spec == "memory":
+        return MemoryBackend()
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+def client_ip(request: Request) -> str:
+    """Client address; the last ``X-Forwarded-For`` hop when behind a trusted proxy."""
+    if settings.THROTTLE_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class Throttle:
+    """Applies the per-IP and per-email limits to an auth attempt."""
+
+    def __init__(self, backend: ThrottleBackend):
+        self.backend = backend
+
+    async def check(self, request: Request, email: Optional[str] = None) -> None:
+        """Consume one attempt for the caller's IP (and ``email``), or raise ``Throttled``."""
+        if not settings.THROTTLE_ENABLED:
+            return
+        retry_after = await self.backend.hit(
+            f"ip:{client_ip(request)}",
+            settings.THROTTLE_IP_BURST,
+            settings.THROTTLE_IP_PER_MINUTE / 60,
+        )
+        if retry_after:
+            auth_throttled.inc(scope="ip")
+            raise Throttled(retry_after)
+        if email:
+            retry_after = await self.backend.hit(
+                f"email:{email.strip().lower()}",
+                settings.THROTTLE_EMAIL_BURST,
+                settings.THROTTLE_EMAIL_PER_MINUTE / 60,
+            )
+            if retry_after:
+                auth_throttled.inc(scope="email")
+                raise Throttled(retry_after)
+
+
+throttle = Throttle(load_backend(settings.THROTTLE_BACKEND))
+registry.gauge(
+    "auth_throttle_buckets", "Token buckets held in memory.",
+    function=lambda: len(throttle.backend) if isinstance(throttle.backend, MemoryBackend) else 0,
+)
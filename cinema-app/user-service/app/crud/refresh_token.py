@@ -0,0 +1,120 @@
+"""
+CRUD operations for rotating refresh tokens.
+"""
+
+import hashlib
+import secrets
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+
+
+def hash_refresh_token(token: str) -> str:
+    """SHA-256 hex digest – tokens are 256-bit random, so no slow KDF is needed."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class Rotation:
+    """Outcome of presenting a refresh token."""
+    user_id: Optional[int]
+    token: Optional[str] = None     # the next refresh token, when accepted
+    reused: bool = False            # a used/revoked token was replayed
+
+
+async def issue_refresh_token(db: AsyncSession, user_id: int, family_id: Optional[str] = None) -> str:
+    """Store a new refresh token (a new family unless ``family_id`` is given)."""
+    token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        insert(RefreshToken).values(
+            token_hash=hash_refresh_token(token),
+            family_id=family_id or uuid.uuid4().hex,
+            user_id=user_id,
+            created_at=now,
+            expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Rotation:
+    """Consume ``token`` and issue its successor in the same family.
+
+    The happy path is one conditional ``UPDATE … RETURNING`` on the unique
+    ``token_hash`` index, one INSERT and one DELETE. Replaying a used or
+    revoked token revokes every token of its family.
+
+    Only the live token and the one just used are kept per family: older
+    used tokens are deleted as the family rotates, so it stays at two rows.
+    Replaying the most recent used token – the one a thief racing the
+    legitimate client would hold – is still detected.
+    """
+    token_hash = hash_refresh_token(token)
+    now = datetime.now(timezone.utc)
+    consumed = (await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(used_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+        .execution_options(synchronize_session=False)
+    )).one_or_none()
+    if consumed is not None:
+        user_id, family_id = consumed
+        await db.execute(
+            delete(RefreshToken)
+            .where(
+                RefreshToken.family_id == family_id,
+                RefreshToken.used_at.is_not(None),
+                RefreshToken.token_hash != token_hash,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return Rotation(user_id, await issue_refresh_token(db, user_id, family_id))
+
+    known = (await db.execute(
+        select(RefreshToken.user_id, RefreshToken.family_id, RefreshToken.used_at, RefreshToken.revoked_at)
+        .where(RefreshToken.token_hash == token_hash)
+    )).one_or_none()
+    if known is None:
+        return Rotation(None)
+    if known.used_at is None and known.revoked_at is None:
+        return Rotation(known.user_id)  # expired
+    await revoke_refresh_family(db, known.family_id)
+    return Rotation(known.user_id, reused=True)
+
+
+async def revoke_refresh_family(db: AsyncSession, family_id: str) -> None:
+    """Revoke every still-valid token of a family."""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def purge_expired_refresh_tokens(db: AsyncSession) -> int:
+    """Delete every expired refresh token; returns how many rows went.
+
+    An expired token is refused whatever its state, so its row is only
+    dead weight (families that stop rotating would otherwise stay forever).
+    """
+    result = await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.expires_at <= datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
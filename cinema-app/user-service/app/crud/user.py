@@ -2,51 +2,246 @@
 CRUD operations for User (async).
 """
 
-from typing import Optional
+from datetime import datetime
+from typing import Any, Optional, Sequence
 
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, Select, any_, bindparam, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
-from app.core.security import get_password_hash
-from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.core.cache import cache_user_on_commit, invalidate_user
+from app.core.config import settings
+from app.core.security import get_password_hash_async
+from app.core.singleflight import SingleFlight
+from app.models.user import User, UserSnapshot
+from app.schemas.user import UserCreate
+
+
+def normalize_email(email: str) -> str:
+    """Canonical stored form of an email address (lower-cased)."""
+    return email.strip().lower()
+
+
+def email_lookup_query(email: str) -> Select:
+    """SELECT for a user by email, served by the unique index on ``users.email``.
+
+    Emails are normalized on write (and enforced by a CHECK constraint), so an
+    equality match on the normalized value is case-insensitive.
+    """
+    return select(User).where(User.email == normalize_email(email))
+
+
+_lookups_by_id = SingleFlight("user_by_id")
+_lookups_by_email = SingleFlight("user_by_email")
+
+
+async def _fetch_user(db: AsyncSession, flights: SingleFlight, key: Any, stmt: Select) -> Optional[User]:
+    """Run a one-row user SELECT, shared with identical lookups already in flight.
+
+    Only lookups made outside a transaction are coalesced: the shared query
+    runs in its own short-lived session on the caller's engine (so replica and
+    primary lookups stay apart), and its row is merged into each caller's
+    session without another round-trip. Inside a transaction the query runs
+    on ``db`` as usual, so it sees the transaction's own writes.
+    """
+    if not settings.USER_LOOKUP_COALESCING or db.in_transaction() or db.bind is None:
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def query() -> Optional[User]:
+        async with AsyncSession(db.bind) as shared:
+            result = await shared.execute(stmt)
+            return result.scalar_one_or_none()
+
+    user = await flights.do((db.bind, key), query)
+    return None if user is None else await db.merge(user, load=False)
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Fetch a user by email address (case-insensitive)."""
-    result = await db.execute(
-        select(User).where(func.lower(User.email) == email.lower())
-    )
-    return result.scalar_one_or_none()
+    return await _fetch_user(db, _lookups_by_email, normalize_email(email), email_lookup_query(email))
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     """Fetch a user by primary key."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    return await _fetch_user(db, _lookups_by_id, user_id, select(User).where(User.id == user_id))
+
+
+async def get_users_by_ids(db: AsyncSession, user_ids: Sequence[int]) -> list[User]:
+    """Fetch many users in one query (``id = ANY(:ids)`` on PostgreSQL).
+
+    Order is unspecified and missing ids are simply absent from the result.
+    """
+    if not user_ids:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        condition = User.id == any_(bindparam("ids", list(user_ids), type_=postgresql.ARRAY(Integer)))
+    else:
+        condition = User.id.in_(user_ids)
+    result = await db.execute(select(User).where(condition))
+    return list(result.scalars())
+
+
+def list_users_query(
+    *,
+    limit: int,
+    after: Optional[tuple[datetime, int]] = None,
+    user_type: Optional[str] = None,
+    is_active: Optional[bool] = None,
+) -> Select:
+    """Keyset page of users, newest first, ordered by ``(created_at, id)`` DESC.
+
+    ``after`` is the ``(created_at, id)`` of the last row of the previous page;
+    the row-value comparison lets the composite indexes seek straight to it,
+    so deep pages cost the same as the first one.
+    """
+    stmt = select(User).order_by(User.created_at.desc(), User.id.desc()).limit(limit)
+    if after is not None:
+        stmt = stmt.where(tuple_(User.created_at, User.id) < tuple_(*after))
+    if user_type is not None:
+        stmt = stmt.where(User.user_type == user_type)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    return stmt
+
+
+async def list_users(db: AsyncSession, **filters: Any) -> list[User]:
+    """Fetch one keyset page (see ``list_users_query`` for the arguments)."""
+    result = await db.execute(list_users_query(**filters))
+    return list(result.scalars())
+
+
+EXPORT_COLUMNS = (
+    User.id, User.email, User.full_name, User.user_type, User.is_active,
+    User.proof_url, User.created_at, User.updated_at,
+)
+
+
+async def stream_users(
+    db: AsyncSession,
+    *,
+    user_type: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> AsyncResult:
+    """Stream export rows (plain tuples, no ORM identity map) via a server-side cursor.
+
+    Rows are fetched ``batch_size`` at a time, so memory stays flat however
+    many users match.
+    """
+    stmt = select(*EXPORT_COLUMNS).order_by(User.id)
+    if user_type is not None:
+        stmt = stmt.where(User.user_type == user_type)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if created_from is not None:
+        stmt = stmt.where(User.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(User.created_at < created_to)
+    return await db.stream(stmt.execution_options(yield_per=batch_size))
+
+
+def _upsert_insert(db: AsyncSession):
+    """Dialect-specific ``insert`` supporting ``ON CONFLICT`` (PostgreSQL / SQLite)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+async def create_user(db: AsyncSession, user_in: UserCreate) -> Optional[User]:
+    """Create a new user with hashed password, user_type, and optional proof.
+
+    Runs as a single ``INSERT … ON CONFLICT (email) DO NOTHING RETURNING``
+    statement; returns None when the email is already registered (including
+    when a concurrent signup wins the race).
+    """
+    insert = _upsert_insert(db)
+    stmt = (
+        insert(User)
+        .values(
+            email=normalize_email(user_in.email),
+            hashed_password=await get_password_hash_async(user_in.password),
+            full_name=user_in.full_name,
+            user_type=user_in.user_type,
+            proof_url=user_in.proof_url,
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    result = await db.execute(stmt)
     return result.scalar_one_or_none()
 
 
-async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
-    """Create a new user with hashed password, user_type, and optional proof."""
-    db_user = User(
-        email=user_in.email.lower(),
-        hashed_password=get_password_hash(user_in.password),
-        full_name=user_in.full_name,
-        user_type=user_in.user_type,
-        proof_url=user_in.proof_url,
+EMAIL_UNIQUE_INDEX = "ix_users_email"
+
+
+def is_duplicate_email(error: IntegrityError) -> bool:
+    """True if ``error`` is the unique index on ``users.email`` rejecting a write."""
+    orig = error.orig
+    # asyncpg: the driver exception is chained; psycopg: ``diag``
+    constraint = getattr(orig.__cause__, "constraint_name", None) or getattr(
+        getattr(orig, "diag", None), "constraint_name", None,
     )
-    db.add(db_user)
-    await db.flush()
-    await db.refresh(db_user)
-    return db_user
+    if constraint is not None:
+        return constraint == EMAIL_UNIQUE_INDEX
+    # SQLite reports the column, not the index name
+    return "UNIQUE constraint failed: users.email" in str(orig)
 
 
-async def update_user(db: AsyncSession, user: User, update_data: UserUpdate) -> User:
-    """Apply partial updates to an existing user."""
-    for field, value in update_data.model_dump(exclude_unset=True).items():
-        setattr(user, field, value)
-    await db.flush()
-    await db.refresh(user)
+class VersionConflict(Exception):
+    """A conditional update found the user at another version than expected."""
+
+    def __init__(self, user_id: int, expected_version: int):
+        super().__init__(f"user {user_id} is no longer at version {expected_version}")
+        self.user_id = user_id
+        self.expected_version = expected_version
+
+
+async def update_user(
+    db: AsyncSession,
+    user_id: int,
+    changes: dict[str, Any],
+    *,
+    expected_version: Optional[int] = None,
+) -> Optional[User]:
+    """Apply a partial update in one ``UPDATE … SET <changed columns> RETURNING``.
+
+    ``updated_at`` is set by the column's ``onupdate`` and ``version`` is
+    bumped; both come back with the rest of the row, any instance already in
+    ``db`` is refreshed from it and the user cache is primed once the
+    transaction commits. Returns None if the user no longer exists.
+
+    With ``expected_version`` the statement also matches ``version``, so no
+    row lock is needed: if another write got there first, nothing is updated
+    and ``VersionConflict`` is raised. A duplicate email surfaces as the
+    unique index's ``IntegrityError``.
+    """
+    if not changes:
+        return await get_user_by_id(db, user_id)
+    if changes.get("email") is not None:
+        changes = {**changes, "email": normalize_email(changes["email"])}
+
+    stmt = update(User).where(User.id == user_id)
+    if expected_version is not None:
+        stmt = stmt.where(User.version == expected_version)
+    stmt = (
+        stmt.values(**changes, version=User.version + 1)
+        .returning(User)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    user = result.scalar_one_or_none()
+    if user is not None:
+        cache_user_on_commit(db, UserSnapshot.from_user(user))
+    elif expected_version is not None:
+        exists = await db.scalar(select(User.id).where(User.id == user_id))
+        if exists is not None:
+            # Whatever snapshot the caller based this on is stale
+            invalidate_user(db, user_id)
+            raise VersionConflict(user_id, expected_version)
     return user
 
 
@@ -54,3 +249,18 @@ async def delete_user(db: AsyncSession, user: User) -> None:
     """Remove a user from the database."""
     await db.delete(user)
     await db.flush()
+    invalidate_user(db, user.id)
+
+
+async def rehash_password(db: AsyncSession, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """Swap in a re-costed hash unless the password changed meanwhile.
+
+    ``updated_at`` is left untouched: this is not a profile change.
+    """
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
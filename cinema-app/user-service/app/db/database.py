@@ -2,15 +2,225 @@
 Async SQLAlchemy engine & session factory.
 """
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import itertools
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.core import metrics
 from app.core.config import settings
+from app.core.shedding import load_shedder
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds the current checkout spent opening new connections (set by the outermost _do_get)
+_connecting: ContextVar[Optional[list[float]]] = ContextVar("pool_connecting", default=None)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long checkouts wait for a free connection.
+
+    Only the time spent queued counts as wait: opening an overflow connection
+    and the pre-ping (which runs after the connection is handed out) do not.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        if _connecting.get() is not None:
+            # QueuePool retries itself on an overflow race; the outer call measures
+            return super()._do_get()
+        connecting = [0.0]
+        token = _connecting.set(connecting)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            _connecting.reset(token)
+            waited = max(time.perf_counter() - start - connecting[0], 0.0)
+            load_shedder.pool_wait.observe(waited)
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            connecting = _connecting.get()
+            if connecting is not None:
+                connecting[0] += time.perf_counter() - start
+
+
+def create_engine_from_settings(url: str) -> AsyncEngine:
+    """Create an async engine for ``url`` using the pool / cache settings.
+
+    SQLite (tests, local tooling) keeps SQLAlchemy's defaults.
+    """
+    if url.startswith("sqlite"):
+        return create_async_engine(url, echo=settings.DEBUG)
+
+    connect_args: dict[str, Any] = {}
+    if "+asyncpg" in url:
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+def pool_stats(async_engine: AsyncEngine) -> dict[str, Any]:
+    """Live statistics for the engine's connection pool."""
+    pool = async_engine.sync_engine.pool
+    stats: dict[str, Any] = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    if "overflow" in stats:
+        # QueuePool counts overflow from -pool_size; only report connections beyond it
+        stats["overflow"] = max(stats["overflow"], 0)
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_seconds_total=pool.wait_seconds_total,
+            wait_seconds_max=pool.wait_seconds_max,
+        )
+    return stats
+
+
+class ReplicaRouter:
+    """Round-robin over read-replica engines, falling back to the primary.
+
+    A replica whose connection fails (connect error or disconnect) is ejected
+    for ``eject_seconds``; when every replica is ejected reads go to the
+    primary until one comes back.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine],
+        eject_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        self._ejected_until: dict[int, float] = {}
+        self._cycle = itertools.cycle(range(len(replicas)))
+        for index, replica in enumerate(replicas):
+            event.listen(replica.sync_engine, "handle_error", self._error_listener(index))
+
+    def _error_listener(self, index: int) -> Callable[[Any], None]:
+        def on_error(context) -> None:
+            if context.is_disconnect or context.connection is None:
+                self.eject(index)
+        return on_error
+
+    def eject(self, index: int) -> None:
+        """Take replica ``index`` out of rotation for ``eject_seconds``."""
+        logger.warning("Ejecting read replica #%d for %.0fs", index, self.eject_seconds)
+        self._ejected_until[index] = self._clock() + self.eject_seconds
+
+    def is_healthy(self, index: int) -> bool:
+        return self._ejected_until.get(index, 0.0) <= self._clock()
+
+    def choose(self) -> AsyncEngine:
+        """Next healthy replica in round-robin order, or the primary."""
+        for _ in range(len(self.replicas)):
+            index = next(self._cycle)
+            if self.is_healthy(index):
+                return self.replicas[index]
+        return self.primary
+
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+# ---------------------------------------------------------------------------
+# Per-statement timing & slow-query log (every engine, including test / replica engines)
+# ---------------------------------------------------------------------------
+_SQL_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+")
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse a statement to its shape: literals and bind markers become ``?``.
+
+    Keeps log lines groupable and free of user data (emails, hashes).
+    """
+    sql = _SQL_PLACEHOLDER.sub("?", statement)
+    sql = _SQL_LITERAL.sub("?", sql)
+    sql = _SQL_PARAM_LIST.sub("(?, ...)", sql)
+    return _SQL_WHITESPACE.sub(" ", sql).strip()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+    metrics.record_query(seconds)
+    if seconds * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "slow query (%.1f ms) in %s: %s",
+            seconds * 1000, metrics.current_endpoint(), normalize_sql(statement),
+        )
+
+
+engine = create_engine_from_settings(settings.DATABASE_URL)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Same pool, but every transaction is started READ ONLY (PostgreSQL; no-op elsewhere)
+read_engine = engine.execution_options(postgresql_readonly=True)
+
+async_read_session = async_sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False,
+)
+
+replica_router = ReplicaRouter(
+    read_engine,
+    [
+        create_engine_from_settings(url).execution_options(postgresql_readonly=True)
+        for url in settings.database_replica_urls
+    ],
+    eject_seconds=settings.DATABASE_REPLICA_EJECT_SECONDS,
+)
+
 
 class Base(DeclarativeBase):
     """Base class for all ORM models."""
@@ -22,3 +232,43 @@ async def get_db():
     async with async_session() as session:
         async with session.begin():
             yield session
+
+
+async def get_read_db():
+    """FastAPI dependency – yields a lazily-begun, read-only async DB session.
+
+    No connection is checked out until the first query runs. Callers should
+    ``await db.close()`` after their last query so the pooled connection is
+    returned before the response is built; the session stays usable and will
+    simply check out a new connection if queried again.
+
+    When read replicas are configured the session is bound to one of them
+    (see ``ReplicaRouter``); use ``uses_replica`` to detect that.
+    """
+    async with async_read_session(bind=replica_router.choose()) as session:
+        yield session
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    """Dependency – session factory for work that outlives the request (background tasks)."""
+    return async_session
+
+
+def uses_replica(db: AsyncSession) -> bool:
+    """True if ``db`` reads from a replica rather than the primary."""
+    return any(db.bind is replica for replica in replica_router.replicas)
+
+
+def _pool_metrics() -> list[metrics.Gauge]:
+    """Scrape-time gauges mirroring ``pool_stats(engine)``."""
+    stats = pool_stats(engine)
+    gauges = []
+    for key in ("size", "checkedout", "overflow", "checkouts", "timeouts", "wait_seconds_total", "wait_seconds_max"):
+        if key in stats:
+            gauge = metrics.Gauge(f"db_pool_{key}", f"Connection pool {key.replace('_', ' ')}.")
+            gauge.set(stats[key])
+            gauges.append(gauge)
+    return gauges
+
+
+metrics.registry.add_collector(_pool_metrics)
@@ -2,26 +2,70 @@
 MyCinema – User Microservice entry point.
 """
 
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.api.v1.endpoints.users import router as users_router
+from app.core import keys
+from app.core.conditional import etag_matches
 from app.core.config import settings
-from app.db.database import Base, engine
-from app.schemas.user import HealthResponse
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.security import PasswordHashPoolBusy, calibrate_bcrypt_rounds, password_hash_pool
+from app.core.shedding import LoadSheddingMiddleware, monitor_loop_lag
+from app.core.throttle import Throttled
+from app.crud.refresh_token import purge_expired_refresh_tokens
+from app.db.database import Base, async_session, engine, pool_stats
+from app.schemas.user import HealthResponse, PoolStatsResponse
+
+logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------------------------
 # Lifespan – create tables on startup (dev convenience)
 # ---------------------------------------------------------------------------
+async def purge_refresh_tokens_forever(interval: float) -> None:
+    """Delete expired refresh tokens every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session() as db:
+                async with db.begin():
+                    purged = await purge_expired_refresh_tokens(db)
+        except Exception:
+            logger.exception("refresh token purge failed")
+            continue
+        if purged:
+            logger.info("purged %d expired refresh tokens", purged)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Create DB tables if they don't exist yet (useful for first run)."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    if settings.BCRYPT_TARGET_MS > 0:
+        settings.BCRYPT_ROUNDS = await asyncio.to_thread(
+            calibrate_bcrypt_rounds, settings.BCRYPT_TARGET_MS,
+        )
+        logger.info(
+            "bcrypt cost calibrated to %d rounds (target %.0f ms)",
+            settings.BCRYPT_ROUNDS, settings.BCRYPT_TARGET_MS,
+        )
+    background = [asyncio.create_task(monitor_loop_lag())]
+    if settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(
+            purge_refresh_tokens_forever(settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS),
+        ))
     yield
+    for task in background:
+        task.cancel()
+    password_hash_pool.shutdown()
 
 
 # ---------------------------------------------------------------------------
@@ -34,6 +78,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Load shedding – inside CORS so 503s still carry CORS headers
+app.add_middleware(LoadSheddingMiddleware)
+
 # CORS – allow all origins in dev (restrict in production)
 app.add_middleware(
     CORSMiddleware,
@@ -43,10 +90,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics – outermost so it times the whole stack (pure ASGI, no per-request task)
+app.add_middleware(MetricsMiddleware)
+
 # Register API routers
 app.include_router(users_router)
 
 
+# ---------------------------------------------------------------------------
+# Error handlers
+# ---------------------------------------------------------------------------
+@app.exception_handler(PasswordHashPoolBusy)
+async def password_hash_pool_busy_handler(request: Request, exc: PasswordHashPoolBusy):
+    """Hashing pool saturated – ask the client to retry instead of queueing forever."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(StaleDataError)
+async def version_conflict_handler(request: Request, exc: StaleDataError):
+    """A versioned ORM write (e.g. DELETE /me) found the user changed by a concurrent request."""
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "Profile was modified by another request, reload and retry"},
+    )
+
+
+@app.exception_handler(Throttled)
+async def throttled_handler(request: Request, exc: Throttled):
+    """Too many login / register attempts from this client or for this email."""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many attempts, please retry later"},
+        headers={"Retry-After": exc.retry_after_header},
+    )
+
+
 # ---------------------------------------------------------------------------
 # Health check (Kubernetes readiness / liveness)
 # ---------------------------------------------------------------------------
@@ -54,3 +136,34 @@ app.include_router(users_router)
 async def health_check():
     """Simple health-check endpoint."""
     return HealthResponse()
+
+
+@app.get("/health/pool", response_model=PoolStatsResponse, tags=["health"])
+async def pool_health():
+    """Live connection pool statistics (checked out, overflow, checkout wait)."""
+    return pool_stats(engine)
+
+
+# ---------------------------------------------------------------------------
+# Metrics (Prometheus text exposition format)
+# ---------------------------------------------------------------------------
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Expose request, DB, hashing and JWT metrics for Prometheus scraping."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# ---------------------------------------------------------------------------
+# JWKS – public keys for local token verification by other services
+# ---------------------------------------------------------------------------
+@app.get("/.well-known/jwks.json", tags=["auth"])
+async def jwks(request: Request):
+    """Public signing keys (RFC 7517). Empty when tokens are HS256-signed."""
+    keyring = keys.keyring
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        "ETag": keyring.jwks_etag,
+    }
+    if etag_matches(request.headers.get("if-none-match"), keyring.jwks_etag, weak=True):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(keyring.jwks_json, media_type="application/json", headers=headers)
@@ -3,9 +3,10 @@ SQLAlchemy ORM model – User table + UserType enum.
 """
 
 import enum
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy import Boolean, CheckConstraint, DateTime, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.database import Base
@@ -23,6 +24,13 @@ class User(Base):
     """User account for the cinema application."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Emails are stored lower-cased so lookups can use the plain unique index
+        CheckConstraint("email = lower(email)", name="ck_users_email_lowercase"),
+        # Keyset pagination of the admin listing: ORDER BY created_at DESC, id DESC
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_type_active_created_at_id", "user_type", "is_active", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
@@ -44,3 +52,41 @@ class User(Base):
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc),
     )
+
+    # Optimistic concurrency: bumped by every write, checked in its WHERE clause
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """Compact, immutable copy of a User row (safe to cache and share).
+
+    Carries every field exposed by ``UserResponse`` – but not the password hash.
+    """
+
+    id: int
+    email: str
+    full_name: str
+    is_active: bool
+    user_type: str
+    proof_url: str | None
+    created_at: datetime
+    updated_at: datetime
+    version: int
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        """Build a snapshot from a loaded ORM instance."""
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            user_type=user.user_type,
+            proof_url=user.proof_url,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            version=user.version,
+        )
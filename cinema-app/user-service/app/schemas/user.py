@@ -8,6 +8,7 @@ from typing import Optional
 
 from pydantic import BaseModel, EmailStr, ConfigDict, field_validator, Field
 
+from app.core.config import settings
 from app.models.user import UserType
 
 
@@ -67,6 +68,14 @@ class UserUpdate(BaseModel):
     user_type: Optional[UserType] = None
     proof_url: Optional[str] = Field(default=None, max_length=512)
 
+    @field_validator("email", "full_name", "user_type", mode="before")
+    @classmethod
+    def reject_null(cls, v):
+        # Omit a field to leave it unchanged; only proof_url can be cleared
+        if v is None:
+            raise ValueError("may be omitted but not null")
+        return v
+
     @field_validator("full_name")
     @classmethod
     def sanitize_update_name(cls, v: str | None) -> str | None:
@@ -100,6 +109,18 @@ class VerifyTypeRequest(BaseModel):
         return v
 
 
+class UserBatchRequest(BaseModel):
+    """Payload for the internal batch lookup (ids, in the order wanted back)."""
+    ids: list[int] = Field(..., min_length=1)
+
+    @field_validator("ids")
+    @classmethod
+    def limit_batch_size(cls, v: list[int]) -> list[int]:
+        if len(v) > settings.USER_BATCH_MAX_IDS:
+            raise ValueError(f"At most {settings.USER_BATCH_MAX_IDS} ids per request")
+        return v
+
+
 # ---------------------------------------------------------------------------
 # Response schemas
 # ---------------------------------------------------------------------------
@@ -117,12 +138,43 @@ class UserResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserBatchResponse(BaseModel):
+    """Batch lookup result: found users in request order + ids not found."""
+    users: list[UserResponse]
+    missing: list[int]
+
+
+class UserPage(BaseModel):
+    """One page of the admin user listing."""
+    items: list[UserResponse]
+    next_cursor: Optional[str] = None
+
+
 class Token(BaseModel):
-    """JWT token response."""
+    """JWT token response (plus a rotating refresh token)."""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    """Body of POST /refresh."""
+    refresh_token: str = Field(..., min_length=1, max_length=255)
 
 
 class HealthResponse(BaseModel):
     """Health-check response."""
     status: str = "ok"
+
+
+class PoolStatsResponse(BaseModel):
+    """Connection pool statistics (fields depend on the pool class)."""
+    pool_class: str
+    size: Optional[int] = None
+    checkedin: Optional[int] = None
+    checkedout: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    timeouts: Optional[int] = None
+    wait_seconds_total: Optional[float] = None
+    wait_seconds_max: Optional[float] = None
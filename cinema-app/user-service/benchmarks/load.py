@@ -0,0 +1,302 @@
+"""
+In-process load benchmark – register / login / refresh / me / update.
+
+Usage::
+
+    python -m benchmarks.load --requests 200 --concurrency 20 --output results.json
+    python -m benchmarks.load --baseline benchmarks/baseline.json --max-regression 20
+    python -m benchmarks.load --database-url postgresql+asyncpg://cinema:…@localhost/cinema_bench
+
+The app is driven through httpx ``ASGITransport`` exactly like the test suite,
+so no server or network is involved: numbers reflect the app, the DB driver
+and bcrypt. By default a throw-away SQLite file is used; ``--database-url``
+points the run at a real database (tables are created if missing, rows are
+left behind – use a scratch database).
+
+Each workload reports p50/p95/p99 latency (ms) and requests/second. With
+``--baseline`` the run fails (exit status 1) when a workload's p95 grows, or
+its throughput drops, by more than ``--max-regression`` percent. Baselines
+are machine-specific: record one with ``--save-baseline`` on the machine
+that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.cache import user_cache
+from app.core.config import settings
+from app.db.database import Base, create_engine_from_settings, get_db, get_read_db, get_sessionmaker
+from app.main import app
+
+WORKLOADS = ("register", "login", "refresh", "me", "update")
+PASSWORD = "BenchPassword123!"
+
+
+@dataclass
+class WorkloadResult:
+    """Latency distribution and throughput of one workload."""
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], errors: int, seconds: float) -> WorkloadResult:
+    """Build a ``WorkloadResult`` from per-request latencies in seconds."""
+    ms = sorted(value * 1000 for value in latencies)
+    return WorkloadResult(
+        requests=len(ms),
+        errors=errors,
+        seconds=round(seconds, 4),
+        rps=round(len(ms) / seconds, 2) if seconds else 0.0,
+        mean_ms=round(sum(ms) / len(ms), 3) if ms else 0.0,
+        p50_ms=round(percentile(ms, 50), 3),
+        p95_ms=round(percentile(ms, 95), 3),
+        p99_ms=round(percentile(ms, 99), 3),
+    )
+
+
+async def drive(
+    call: Callable[[int], Awaitable[Any]],
+    *,
+    requests: int,
+    concurrency: int,
+) -> WorkloadResult:
+    """Run ``call(i)`` for ``i in range(requests)`` with ``concurrency`` workers."""
+    latencies: list[float] = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            resp = await call(i)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_workloads(
+    client: AsyncClient,
+    *,
+    requests: int,
+    concurrency: int,
+    workloads: tuple[str, ...] = WORKLOADS,
+) -> dict[str, WorkloadResult]:
+    """Run the selected workloads one after another against ``client``."""
+    run_id = uuid.uuid4().hex[:8]
+    results: dict[str, WorkloadResult] = {}
+
+    def email(kind: str, i: int) -> str:
+        return f"bench-{run_id}-{kind}{i}@cinema.com"
+
+    async def register(i: int, kind: str = "register"):
+        return await client.post("/api/v1/users/register", json={
+            "email": email(kind, i), "password": PASSWORD, "full_name": f"Bench {i}",
+        })
+
+    async def login(i: int):
+        return await client.post("/api/v1/users/login", data={
+            "username": email("seed", i % concurrency), "password": PASSWORD,
+        })
+
+    # Seed one account per worker for the authenticated workloads
+    needs_seed = any(w in workloads for w in ("login", "refresh", "me", "update"))
+    headers: list[dict[str, str]] = []
+    # Refresh tokens are single-use: each call takes one and puts its successor back
+    refresh_tokens: asyncio.Queue[str] = asyncio.Queue()
+    if needs_seed:
+        for i in range(concurrency):
+            await register(i, kind="seed")
+            tokens = (await login(i)).json()
+            headers.append({"Authorization": f"Bearer {tokens['access_token']}"})
+            refresh_tokens.put_nowait(tokens["refresh_token"])
+
+    async def refresh(i: int):
+        token = await refresh_tokens.get()
+        resp = await client.post("/api/v1/users/refresh", json={"refresh_token": token})
+        # On failure put the old token back so other workers never wait forever
+        refresh_tokens.put_nowait(resp.json()["refresh_token"] if resp.status_code == 200 else token)
+        return resp
+
+    async def me(i: int):
+        return await client.get("/api/v1/users/me", headers=headers[i % concurrency])
+
+    async def update(i: int):
+        return await client.put(
+            "/api/v1/users/me", json={"full_name": f"Bench {i}"}, headers=headers[i % concurrency],
+        )
+
+    calls = {"register": register, "login": login, "refresh": refresh, "me": me, "update": update}
+    for name in workloads:
+        results[name] = await drive(calls[name], requests=requests, concurrency=concurrency)
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    max_regression: float,
+) -> list[str]:
+    """Return a message per workload that regressed beyond ``max_regression`` %."""
+    failures = []
+    factor = max_regression / 100
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + factor):
+            failures.append(
+                f"{name}: p95 {current['p95_ms']:.1f} ms > baseline {base['p95_ms']:.1f} ms"
+                f" +{max_regression:g}%"
+            )
+        if base["rps"] and current["rps"] < base["rps"] * (1 - factor):
+            failures.append(
+                f"{name}: {current['rps']:.1f} req/s < baseline {base['rps']:.1f} req/s"
+                f" -{max_regression:g}%"
+            )
+    return failures
+
+
+def _sqlite_wal(engine: AsyncEngine) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+
+async def benchmark(
+    database_url: str,
+    *,
+    requests: int,
+    concurrency: int,
+    workloads: tuple[str, ...] = WORKLOADS,
+) -> dict[str, Any]:
+    """Point the app at ``database_url`` and run the workloads in-process."""
+    engine = create_engine_from_settings(database_url)
+    if engine.dialect.name == "sqlite":
+        _sqlite_wal(engine)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            async with session.begin():
+                yield session
+
+    async def override_get_read_db():
+        async with session_factory() as session:
+            yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    previous = dict(app.dependency_overrides)
+    # Every simulated client shares one address: the login throttle would cap the run
+    throttle_enabled, settings.THROTTLE_ENABLED = settings.THROTTLE_ENABLED, False
+    # Measure the service itself, not the shedder's reaction to the benchmark's own load
+    shed_enabled, settings.SHED_ENABLED = settings.SHED_ENABLED, False
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    app.dependency_overrides[get_sessionmaker] = lambda: session_factory
+    user_cache.clear()
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = await run_workloads(
+                client, requests=requests, concurrency=concurrency, workloads=workloads,
+            )
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous)
+        settings.THROTTLE_ENABLED = throttle_enabled
+        settings.SHED_ENABLED = shed_enabled
+        user_cache.clear()
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "dialect": engine.dialect.name,
+            "requests": requests,
+            "concurrency": concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "workloads": {name: asdict(result) for name, result in results.items()},
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="In-process load benchmark for the user service.")
+    parser.add_argument("--database-url", help="default: a temporary SQLite file")
+    parser.add_argument("--requests", type=int, default=200, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="comma-separated subset")
+    parser.add_argument("--output", type=Path, help="write JSON results here")
+    parser.add_argument("--baseline", type=Path, help="compare against this results file")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown, percent")
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    args = parser.parse_args(argv)
+
+    workloads = tuple(w.strip() for w in args.workloads.split(",") if w.strip())
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        report = asyncio.run(benchmark(
+            url, requests=args.requests, concurrency=args.concurrency, workloads=workloads,
+        ))
+
+    print(f"{'workload':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in report["workloads"].items():
+        print(f"{name:<10} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.baseline and args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        return 0
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        failures = compare(report["workloads"], baseline["workloads"], args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Micro-benchmarks for ``app.core.security`` – bcrypt, JWT and hashing in the event loop.
+
+Usage::
+
+    python -m benchmarks.security
+    python -m benchmarks.security --rounds 10,12,14 --algorithms HS256,RS256,ES256 --output security.json
+
+Three suites:
+
+* ``bcrypt`` – ``get_password_hash`` / ``verify_password`` at each cost factor
+  (``--rounds``); the app's own cost is what ``get_password_hash`` uses.
+* ``jwt`` – token encode / decode (HS* through the app functions, RS*/ES*
+  with freshly generated keys) for small, medium and large claim sets. The
+  app-path decode verifies the signature every time, bypassing the token
+  cache; ``decode_cached`` times a ``decode_access_token`` cache hit.
+* ``loop`` – ``--concurrency`` simultaneous verifications run inline (blocking
+  the event loop) versus through ``verify_password_async``, while a probe
+  coroutine measures how late a cheap request would be served.
+
+Every case reports ops/sec and p50/p95/p99 latency. The JSON output records
+the bcrypt / python-jose / cryptography versions, so numbers can be compared
+across dependency upgrades on the same machine.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import bcrypt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk, jwt
+
+from app.core.config import settings
+from app.core.security import (
+    _verify_token,
+    create_access_token,
+    decode_access_token,
+    get_password_hash,
+    password_hash_pool,
+    password_hash_rounds,
+    verify_password,
+    verify_password_async,
+)
+from benchmarks.load import percentile
+
+PASSWORD = "BenchPassword123!"
+# No iss/aud: the app verifies tokens without an expected audience, so jose would reject them
+CLAIM_SETS: dict[str, dict[str, Any]] = {
+    "small": {"sub": "12345"},
+    "medium": {
+        "sub": "12345", "email": "bench@cinema.com", "user_type": "etudiant",
+        "roles": ["user", "moderator"], "name": "Bench User", "locale": "fr-FR",
+    },
+    "large": {
+        "sub": "12345", "email": "bench@cinema.com",
+        "permissions": [f"cinema:{i}:read" for i in range(150)],
+    },
+}
+
+
+def measure(fn: Callable[[], Any], iterations: int) -> dict[str, float]:
+    """Call ``fn`` ``iterations`` times; return ops/sec and latency percentiles (ms)."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    total = sum(samples) / 1000
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 2) if total else 0.0,
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p95_ms": round(percentile(samples, 95), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Suites
+# ---------------------------------------------------------------------------
+def bench_bcrypt(rounds: list[int], iterations: int) -> dict[str, Any]:
+    """Hash / verify at each cost factor, plus the app's configured functions."""
+    results: dict[str, Any] = {}
+    app_hash = get_password_hash(PASSWORD)
+    results["app"] = {
+        "rounds": password_hash_rounds(app_hash),
+        "hash": measure(lambda: get_password_hash(PASSWORD), iterations),
+        "verify": measure(lambda: verify_password(PASSWORD, app_hash), iterations),
+    }
+    encoded = PASSWORD.encode()
+    for cost in rounds:
+        hashed = bcrypt.hashpw(encoded, bcrypt.gensalt(cost))
+        results[f"rounds={cost}"] = {
+            "rounds": cost,
+            "hash": measure(lambda: bcrypt.hashpw(encoded, bcrypt.gensalt(cost)), iterations),
+            "verify": measure(lambda: bcrypt.checkpw(encoded, hashed), iterations),
+        }
+    return results
+
+
+def _signing_keys(algorithm: str) -> tuple[Any, Any]:
+    """Return ``(signing key, verification key)`` for ``algorithm``.
+
+    Asymmetric keys are returned pre-built with ``jwk.construct``: passing PEM
+    strings makes python-jose re-parse (and, for RSA, re-validate) the key on
+    every call, which would dominate the measurement.
+    """
+    if algorithm.startswith("HS"):
+        return settings.SECRET_KEY, settings.SECRET_KEY
+    if algorithm.startswith(("RS", "PS")):
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm.startswith("ES"):
+        curve = {"ES256": ec.SECP256R1(), "ES384": ec.SECP384R1(), "ES512": ec.SECP521R1()}[algorithm]
+        private = ec.generate_private_key(curve)
+    else:
+        raise ValueError(f"unsupported algorithm {algorithm}")
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    )
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return jwk.construct(private_pem, algorithm), jwk.construct(public_pem, algorithm)
+
+
+def bench_jwt(algorithms: list[str], iterations: int) -> dict[str, Any]:
+    """Encode / decode for every algorithm × claim set."""
+    results: dict[str, Any] = {}
+    for algorithm in algorithms:
+        signing_key, verify_key = _signing_keys(algorithm)
+        for size, claims in CLAIM_SETS.items():
+            if algorithm == settings.ALGORITHM:
+                # The app's own code path (expiry claim, key ring, timing hooks), minus the token cache
+                token = create_access_token(claims)
+                encode = lambda claims=claims: create_access_token(claims)
+                decode = lambda token=token: _verify_token(token)
+            else:
+                token = jwt.encode(claims, signing_key, algorithm=algorithm)
+                encode = lambda claims=claims, key=signing_key, alg=algorithm: jwt.encode(claims, key, algorithm=alg)
+                decode = lambda token=token, key=verify_key, alg=algorithm: jwt.decode(token, key, algorithms=[alg])
+            if decode() is None:
+                raise RuntimeError(f"{algorithm}/{size} token was rejected, the decode timing would be meaningless")
+            results[f"{algorithm}/{size}"] = {
+                "token_bytes": len(token),
+                "encode": measure(encode, iterations),
+                "decode": measure(decode, iterations),
+            }
+            if algorithm == settings.ALGORITHM:
+                decode_access_token(token)  # warm the cache
+                results[f"{algorithm}/{size}"]["decode_cached"] = measure(
+                    lambda token=token: decode_access_token(token), iterations,
+                )
+    return results
+
+
+async def _run_with_probe(work: Callable[[], Any], concurrency: int, probe_interval: float) -> dict[str, Any]:
+    """Run ``concurrency`` copies of ``work`` while probing event-loop lag."""
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def probe() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(probe_interval)
+            lags.append((time.perf_counter() - start - probe_interval) * 1000)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(work() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    lags.sort()
+    return {
+        "concurrency": concurrency,
+        "ops_per_sec": round(concurrency / elapsed, 2),
+        "wall_ms": round(elapsed * 1000, 2),
+        "probe_samples": len(lags),
+        "probe_lag_p50_ms": round(percentile(lags, 50), 3),
+        "probe_lag_p99_ms": round(percentile(lags, 99), 3),
+        "probe_lag_max_ms": round(lags[-1], 3) if lags else 0.0,
+    }
+
+
+async def bench_loop(concurrency: int, probe_interval: float = 0.005) -> dict[str, Any]:
+    """Inline bcrypt versus the hashing pool, seen from a concurrent cheap request."""
+    hashed = get_password_hash(PASSWORD)
+
+    async def inline() -> None:
+        verify_password(PASSWORD, hashed)
+
+    async def pooled() -> None:
+        await verify_password_async(PASSWORD, hashed)
+
+    try:
+        return {
+            "inline": await _run_with_probe(inline, concurrency, probe_interval),
+            "pool": await _run_with_probe(pooled, concurrency, probe_interval),
+            "pool_kind": password_hash_pool.kind,
+            "pool_workers": password_hash_pool.workers,
+        }
+    finally:
+        password_hash_pool.shutdown()
+
+
+def _versions() -> dict[str, str]:
+    versions = {"python": platform.python_version()}
+    for dist in ("bcrypt", "python-jose", "cryptography"):
+        try:
+            versions[dist] = metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            versions[dist] = "missing"
+    return versions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for app.core.security.")
+    parser.add_argument("--suites", default="bcrypt,jwt,loop", help="comma-separated subset")
+    parser.add_argument("--rounds", default="10,12", help="bcrypt cost factors")
+    parser.add_argument("--algorithms", default="HS256,RS256,ES256", help="JWT algorithms")
+    parser.add_argument("--bcrypt-iterations", type=int, default=10)
+    parser.add_argument("--jwt-iterations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous verifications (loop suite)")
+    parser.add_argument("--output", type=Path, help="write JSON results here")
+    args = parser.parse_args(argv)
+
+    suites = {s.strip() for s in args.suites.split(",") if s.strip()}
+    report: dict[str, Any] = {
+        "meta": {**_versions(), "machine": platform.machine(), "app_algorithm": settings.ALGORITHM},
+    }
+    if "bcrypt" in suites:
+        report["bcrypt"] = bench_bcrypt([int(r) for r in args.rounds.split(",")], args.bcrypt_iterations)
+        for name, r in report["bcrypt"].items():
+            print(f"bcrypt {name:<10} hash {r['hash']['ops_per_sec']:>8.2f}/s  verify {r['verify']['ops_per_sec']:>8.2f}/s"
+                  f"  p95 {r['verify']['p95_ms']:.1f} ms")
+    if "jwt" in suites:
+        report["jwt"] = bench_jwt([a.strip() for a in args.algorithms.split(",")], args.jwt_iterations)
+        for name, r in report["jwt"].items():
+            cached = f"  cached {r['decode_cached']['ops_per_sec']:>9.0f}/s" if "decode_cached" in r else ""
+            print(f"jwt {name:<14} {r['token_bytes']:>5} B  encode {r['encode']['ops_per_sec']:>9.0f}/s"
+                  f"  decode {r['decode']['ops_per_sec']:>9.0f}/s{cached}")
+    if "loop" in suites:
+        report["loop"] = asyncio.run(bench_loop(args.concurrency))
+        for mode in ("inline", "pool"):
+            r = report["loop"][mode]
+            print(f"loop {mode:<7} {r['ops_per_sec']:>8.2f} verify/s  probe lag p99 {r['probe_lag_p99_ms']:.1f} ms"
+                  f"  max {r['probe_lag_max_ms']:.1f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
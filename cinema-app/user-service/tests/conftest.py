@@ -6,7 +6,11 @@ import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.db.database import Base, get_db
+from app.core.cache import token_cache, user_cache
+from app.core.config import settings
+from app.core.security import clear_revocations
+from app.core.throttle import throttle
+from app.db.database import Base, get_db, get_read_db, get_sessionmaker
 from app.main import app
 
 # In-memory SQLite for fast, isolated tests
@@ -15,6 +19,9 @@ TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 TestSession = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
 
+# Minimum bcrypt cost keeps the suite fast (production default: 12)
+settings.BCRYPT_ROUNDS = 4
+
 
 async def _override_get_db():
     async with TestSession() as session:
@@ -22,7 +29,14 @@ async def _override_get_db():
             yield session
 
 
+async def _override_get_read_db():
+    async with TestSession() as session:
+        yield session
+
+
 app.dependency_overrides[get_db] = _override_get_db
+app.dependency_overrides[get_read_db] = _override_get_read_db
+app.dependency_overrides[get_sessionmaker] = lambda: TestSession
 
 
 @pytest_asyncio.fixture
@@ -37,3 +51,24 @@ async def client():
 
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    user_cache.clear()
+    token_cache.clear()
+    clear_revocations()
+    throttle.backend.clear()
+
+
+@pytest_asyncio.fixture
+async def db_session():
+    """Yield a bare AsyncSession on a fresh schema (for CRUD-level tests)."""
+    async with test_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with TestSession() as session:
+        yield session
+
+    async with test_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    user_cache.clear()
+    token_cache.clear()
+    clear_revocations()
+    throttle.backend.clear()
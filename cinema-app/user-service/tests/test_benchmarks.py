@@ -0,0 +1,82 @@
+"""
+Tests for the benchmark harnesses (load statistics, baseline comparison, smoke runs).
+"""
+
+from app.core.config import settings
+from app.db.database import get_db
+from app.main import app
+from benchmarks.load import benchmark, compare, percentile, summarize
+from benchmarks.security import bench_bcrypt, bench_jwt
+
+
+# ============================================================================
+# 📊 Statistics & regression check
+# ============================================================================
+def test_percentile_nearest_rank():
+    """Nearest-rank percentiles on a sorted sample."""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_reports_rps_and_latencies():
+    """Latencies are reported in ms, throughput from the wall time."""
+    result = summarize([0.010, 0.020, 0.030, 0.040], errors=1, seconds=0.5)
+    assert result.requests == 4
+    assert result.errors == 1
+    assert result.rps == 8.0
+    assert result.p50_ms == 20.0
+    assert result.p99_ms == 40.0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Only p95 growth / throughput loss over the threshold fails."""
+    baseline = {"me": {"p95_ms": 10.0, "rps": 1000.0}, "login": {"p95_ms": 200.0, "rps": 5.0}}
+    within = {"me": {"p95_ms": 11.5, "rps": 900.0}, "login": {"p95_ms": 210.0, "rps": 5.0}}
+    assert compare(within, baseline, max_regression=20) == []
+
+    slower = {"me": {"p95_ms": 13.0, "rps": 700.0}}
+    failures = compare(slower, baseline, max_regression=20)
+    assert len(failures) == 2
+    assert all(f.startswith("me:") for f in failures)
+
+
+# ============================================================================
+# 🏃 Smoke run
+# ============================================================================
+async def test_benchmark_runs_in_process(tmp_path):
+    """A tiny run completes without errors and restores the app's overrides."""
+    override = app.dependency_overrides[get_db]
+    report = await benchmark(
+        f"sqlite+aiosqlite:///{tmp_path / 'bench.db'}",
+        requests=6, concurrency=2, workloads=("me", "update"),
+    )
+    assert report["meta"]["dialect"] == "sqlite"
+    for name in ("me", "update"):
+        assert report["workloads"][name]["requests"] == 6
+        assert report["workloads"][name]["errors"] == 0
+    assert app.dependency_overrides[get_db] is override
+    assert settings.THROTTLE_ENABLED
+
+
+# ============================================================================
+# 🔐 Security micro-benchmarks
+# ============================================================================
+def test_bench_bcrypt_reports_each_cost():
+    """Every requested cost factor is measured next to the app's own."""
+    results = bench_bcrypt([4, 5], iterations=2)
+    assert set(results) == {"app", "rounds=4", "rounds=5"}
+    assert results["rounds=4"]["rounds"] == 4
+    assert results["rounds=5"]["hash"]["iterations"] == 2
+
+
+def test_bench_jwt_covers_algorithms_and_claim_sizes():
+    """HS256 (app path) and ES256 are measured for every claim set."""
+    results = bench_jwt(["HS256", "ES256"], iterations=3)
+    assert set(results) == {f"{a}/{s}" for a in ("HS256", "ES256") for s in ("small", "medium", "large")}
+    assert results["HS256/large"]["token_bytes"] > results["HS256/small"]["token_bytes"]
+    assert results["ES256/small"]["decode"]["iterations"] == 3
+    assert "decode_cached" in results["HS256/medium"]
+    assert "decode_cached" not in results["ES256/medium"]
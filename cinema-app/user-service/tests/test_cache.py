@@ -0,0 +1,101 @@
+"""
+Tests for the in-process LRU/TTL cache and the authenticated-user cache.
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.cache import LRUTTLCache, user_cache
+from tests.test_users import get_auth_header
+
+
+# ============================================================================
+# 🧠 LRUTTLCache
+# ============================================================================
+def test_cache_lru_eviction():
+    """The least recently used entry is evicted first."""
+    cache = LRUTTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl_expiry():
+    """Entries are not served past their TTL."""
+    now = [0.0]
+    cache = LRUTTLCache(maxsize=10, ttl=5, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_cache_per_entry_ttl():
+    """A per-entry ttl shortens (never extends) the cache-wide TTL."""
+    now = [0.0]
+    cache = LRUTTLCache(maxsize=10, ttl=5, clock=lambda: now[0])
+    cache.set("short", 1, ttl=2)
+    cache.set("long", 2, ttl=50)
+    cache.set("expired", 3, ttl=-1)
+    now[0] = 2.5
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert cache.get("expired") is None
+    now[0] = 5.0
+    assert cache.get("long") is None
+
+
+def test_cache_disabled_when_size_zero():
+    """maxsize=0 turns the cache into a no-op."""
+    cache = LRUTTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+# ============================================================================
+# 👤 Authenticated-user cache
+# ============================================================================
+@pytest.mark.asyncio
+async def test_get_me_served_from_cache(client: AsyncClient):
+    """A second GET /me is a cache hit."""
+    headers = await get_auth_header(client)
+    await client.get("/api/v1/users/me", headers=headers)
+    hits = user_cache.hits
+    resp = await client.get("/api/v1/users/me", headers=headers)
+    assert resp.status_code == 200
+    assert user_cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_update_me_invalidates_cache(client: AsyncClient):
+    """PUT /me is visible on the next GET /me."""
+    headers = await get_auth_header(client)
+    await client.get("/api/v1/users/me", headers=headers)
+    await client.put("/api/v1/users/me", json={"full_name": "Cached Name"}, headers=headers)
+    resp = await client.get("/api/v1/users/me", headers=headers)
+    assert resp.json()["full_name"] == "Cached Name"
+
+
+@pytest.mark.asyncio
+async def test_verify_type_invalidates_cache(client: AsyncClient):
+    """POST /verify-type is visible on the next GET /me."""
+    headers = await get_auth_header(client)
+    await client.get("/api/v1/users/me", headers=headers)
+    await client.post(
+        "/api/v1/users/verify-type",
+        json={"user_type": "etudiant", "proof_url": "https://example.com/carte.jpg"},
+        headers=headers,
+    )
+    resp = await client.get("/api/v1/users/me", headers=headers)
+    assert resp.json()["user_type"] == "etudiant"
@@ -0,0 +1,295 @@
+"""
+CRUD-level tests – query shape, index usage and migrations.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.core.config import settings
+from app.core.cache import user_cache
+from app.crud.user import (
+    VersionConflict,
+    create_user,
+    email_lookup_query,
+    get_user_by_email,
+    is_duplicate_email,
+    list_users_query,
+    update_user,
+)
+from app.schemas.user import UserCreate
+from tests.conftest import TestSession
+
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+
+
+@contextmanager
+def capture_sql(session: AsyncSession):
+    """Collect the SQL statements executed through ``session``'s engine."""
+    statements: list[str] = []
+    engine = session.bind.sync_engine
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+# ============================================================================
+# 🔎 Email lookup
+# ============================================================================
+@pytest.mark.asyncio
+async def test_email_lookup_uses_unique_index(db_session: AsyncSession):
+    """EXPLAIN shows the email lookup is an index search, not a table scan."""
+    plan = await explain(db_session, email_lookup_query("John@Cinema.com"))
+    assert "ix_users_email" in plan
+    assert "SCAN" not in plan
+
+
+async def explain(session: AsyncSession, stmt) -> str:
+    """Return SQLite's EXPLAIN QUERY PLAN for ``stmt`` as one string."""
+    compiled = stmt.compile(dialect=session.bind.dialect)
+    conn = await session.connection()
+    result = await conn.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}", tuple(compiled.params.values()),
+    )
+    return " ".join(str(row[-1]) for row in result)
+
+
+@pytest.mark.asyncio
+async def test_email_lookup_is_case_insensitive(db_session: AsyncSession):
+    """Mixed-case input finds the normalized row."""
+    await create_user(db_session, UserCreate(
+        email="Mixed.Case@Cinema.com", password="MixedCase1!", full_name="Mixed",
+    ))
+    user = await get_user_by_email(db_session, "MIXED.case@cinema.COM")
+    assert user is not None
+    assert user.email == "mixed.case@cinema.com"
+
+
+# ============================================================================
+# 📋 Keyset listing
+# ============================================================================
+@pytest.mark.asyncio
+async def test_listing_seeks_index_without_sorting(db_session: AsyncSession):
+    """Deep pages seek the composite index: no OFFSET, no sort step."""
+    after = (datetime(2026, 1, 1), 1000)
+    plain_query = list_users_query(limit=10, after=after)
+    filtered_query = list_users_query(limit=10, after=after, user_type="etudiant", is_active=True)
+
+    plain = await explain(db_session, plain_query)
+    filtered = await explain(db_session, filtered_query)
+    assert "ix_users_created_at_id" in plain
+    assert "ix_users_type_active_created_at_id" in filtered
+    for query, plan in ((plain_query, plain), (filtered_query, filtered)):
+        assert "TEMP B-TREE" not in plan
+        assert "OFFSET" not in str(query).upper()
+
+
+# ============================================================================
+# 📝 Registration
+# ============================================================================
+@pytest.mark.asyncio
+async def test_create_user_is_single_statement(db_session: AsyncSession):
+    """create_user issues exactly one INSERT … RETURNING."""
+    with capture_sql(db_session) as statements:
+        user = await create_user(db_session, UserCreate(
+            email="single@cinema.com", password="SingleShot1!", full_name="Single",
+        ))
+    assert user is not None and user.id is not None
+    assert user.created_at is not None
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("INSERT")
+    assert "RETURNING" in statements[0].upper()
+
+
+@pytest.mark.asyncio
+async def test_create_user_duplicate_returns_none(db_session: AsyncSession):
+    """A conflicting email yields None instead of an IntegrityError."""
+    user_in = UserCreate(email="dup@cinema.com", password="Duplicate1!", full_name="Dup")
+    assert await create_user(db_session, user_in) is not None
+    assert await create_user(db_session, user_in.model_copy(update={"email": "DUP@cinema.com"})) is None
+
+
+# ============================================================================
+# ✏️ Partial updates
+# ============================================================================
+@pytest.mark.asyncio
+async def test_update_user_is_single_returning_statement(db_session: AsyncSession):
+    """update_user issues one UPDATE … RETURNING touching only changed columns."""
+    user = await create_user(db_session, UserCreate(
+        email="patch@cinema.com", password="PatchMe123!", full_name="Patch",
+    ))
+    before = user.updated_at
+    with capture_sql(db_session) as statements:
+        updated = await update_user(db_session, user.id, {"full_name": "Patched"})
+    assert len(statements) == 1
+    sql = statements[0].upper()
+    assert sql.lstrip().startswith("UPDATE") and "RETURNING" in sql
+    assert "EMAIL" not in sql.split("WHERE")[0]
+    assert updated is user
+    assert user.full_name == "Patched"
+    assert user.updated_at >= before
+
+
+@pytest.mark.asyncio
+async def test_update_user_primes_cache_on_commit(db_session: AsyncSession):
+    """The returned row is cached only once the transaction commits."""
+    user = await create_user(db_session, UserCreate(
+        email="primed@cinema.com", password="PrimeMe123!", full_name="Primed",
+    ))
+    await update_user(db_session, user.id, {"full_name": "Fresh"})
+    assert user_cache.get(user.id) is None
+    await db_session.commit()
+    assert user_cache.get(user.id).full_name == "Fresh"
+
+
+@pytest.mark.asyncio
+async def test_update_user_missing_returns_none(db_session: AsyncSession):
+    """Updating a non-existent id returns None."""
+    assert await update_user(db_session, 99999, {"full_name": "Ghost"}) is None
+
+
+# ============================================================================
+# 🔢 Optimistic concurrency (version)
+# ============================================================================
+@pytest.mark.asyncio
+async def test_update_user_bumps_version(db_session: AsyncSession):
+    """Each update increments version; expected_version goes into the WHERE clause."""
+    user = await create_user(db_session, UserCreate(
+        email="versioned@cinema.com", password="Version123!", full_name="V1",
+    ))
+    assert user.version == 1
+    with capture_sql(db_session) as statements:
+        await update_user(db_session, user.id, {"full_name": "V2"}, expected_version=1)
+    assert len(statements) == 1
+    assert "VERSION" in statements[0].upper().split("WHERE")[1]
+    assert user.version == 2
+    await update_user(db_session, user.id, {"full_name": "V3"})
+    assert user.version == 3
+
+
+@pytest.mark.asyncio
+async def test_update_user_stale_version_conflicts(db_session: AsyncSession):
+    """A write based on an outdated read changes nothing and raises VersionConflict."""
+    user = await create_user(db_session, UserCreate(
+        email="racer@cinema.com", password="Racer1234!", full_name="Original",
+    ))
+    await update_user(db_session, user.id, {"full_name": "First writer"}, expected_version=1)
+    user_cache.set(user.id, "stale snapshot")
+    with pytest.raises(VersionConflict) as exc:
+        await update_user(db_session, user.id, {"full_name": "Second writer"}, expected_version=1)
+    assert exc.value.expected_version == 1
+    assert user_cache.get(user.id) is None
+    assert user.full_name == "First writer"
+    assert user.version == 2
+
+
+@pytest.mark.asyncio
+async def test_update_user_missing_with_version_returns_none(db_session: AsyncSession):
+    """A deleted user is still None, not a conflict."""
+    assert await update_user(db_session, 99999, {"full_name": "Ghost"}, expected_version=1) is None
+
+
+@pytest.mark.asyncio
+async def test_only_email_unique_violation_is_duplicate_email(db_session: AsyncSession):
+    """A NOT NULL failure is not mistaken for a duplicate email."""
+    await create_user(db_session, UserCreate(email="taken@cinema.com", password="Taken1234!", full_name="T"))
+    user = await create_user(db_session, UserCreate(email="mine@cinema.com", password="Mine12345!", full_name="M"))
+    user_id = user.id
+    await db_session.commit()
+
+    with pytest.raises(IntegrityError) as exc:
+        await update_user(db_session, user_id, {"email": "Taken@cinema.com"})
+    assert is_duplicate_email(exc.value)
+    await db_session.rollback()
+
+    with pytest.raises(IntegrityError) as exc:
+        await update_user(db_session, user_id, {"full_name": None})
+    assert not is_duplicate_email(exc.value)
+    await db_session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_orm_flush_checks_version(db_session: AsyncSession):
+    """Unit-of-work writes (e.g. delete) use version_id_col and fail on stale rows."""
+    user = await create_user(db_session, UserCreate(
+        email="stale@cinema.com", password="Stale12345!", full_name="Stale",
+    ))
+    await db_session.commit()
+    async with TestSession() as other:
+        await update_user(other, user.id, {"full_name": "Changed elsewhere"})
+        await other.commit()
+    await db_session.delete(user)
+    with pytest.raises(StaleDataError):
+        await db_session.flush()
+
+
+# ============================================================================
+# 🔄 Migrations
+# ============================================================================
+def _alembic_config() -> Config:
+    cfg = Config()
+    cfg.set_main_option("script_location", str(SERVICE_ROOT / "alembic"))
+    return cfg
+
+
+def test_migration_backfills_lowercase_emails(tmp_path, monkeypatch):
+    """0002 lower-cases existing emails and adds the CHECK constraint."""
+    db_file = tmp_path / "migrate.db"
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite+aiosqlite:///{db_file}")
+    cfg = _alembic_config()
+
+    command.upgrade(cfg, "0001")
+    with sqlite3.connect(db_file) as conn:
+        conn.executemany(
+            "INSERT INTO users (email, hashed_password, full_name, is_active) VALUES (?, 'x', 'n', 1)",
+            [("Legacy@Cinema.com",), ("already@cinema.com",)],
+        )
+
+    command.upgrade(cfg, "head")
+    with sqlite3.connect(db_file) as conn:
+        emails = sorted(row[0] for row in conn.execute("SELECT email FROM users"))
+        assert emails == ["already@cinema.com", "legacy@cinema.com"]
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO users (email, hashed_password, full_name, is_active) "
+                "VALUES ('Upper@Cinema.com', 'x', 'n', 1)"
+            )
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "refresh_tokens" in tables
+        # 0005 starts existing rows at version 1
+        assert {row[0] for row in conn.execute("SELECT version FROM users")} == {1}
+
+
+def test_migration_reports_case_variants_in_one_batch(tmp_path, monkeypatch):
+    """Two non-lower-case variants of one address get the conflict report, not a unique violation."""
+    db_file = tmp_path / "migrate.db"
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite+aiosqlite:///{db_file}")
+    cfg = _alembic_config()
+
+    command.upgrade(cfg, "0001")
+    with sqlite3.connect(db_file) as conn:
+        conn.executemany(
+            "INSERT INTO users (email, hashed_password, full_name, is_active) VALUES (?, 'x', 'n', 1)",
+            [("A@x.com",), ("a@X.com",), ("Solo@x.com",)],
+        )
+
+    with pytest.raises(RuntimeError, match="2 user"):
+        command.upgrade(cfg, "head")
+    with sqlite3.connect(db_file) as conn:
+        emails = sorted(row[0] for row in conn.execute("SELECT email FROM users"))
+    assert emails == ["A@x.com", "a@X.com", "solo@x.com"]
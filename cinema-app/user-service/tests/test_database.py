@@ -0,0 +1,150 @@
+"""
+Tests for the DB session layer (engines, session dependencies).
+"""
+
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.database import (
+    InstrumentedQueuePool,
+    ReplicaRouter,
+    async_read_session,
+    create_engine_from_settings,
+    get_read_db,
+    pool_stats,
+    read_engine,
+)
+
+
+# ============================================================================
+# 📖 Read-only sessions
+# ============================================================================
+def test_read_engine_starts_read_only_transactions():
+    """The read engine shares the pool but flags transactions READ ONLY."""
+    assert read_engine.get_execution_options()["postgresql_readonly"] is True
+
+
+@pytest.mark.asyncio
+async def test_read_session_is_lazily_begun():
+    """get_read_db does not begin a transaction (nor check out a connection) up front."""
+    dependency = get_read_db()
+    session = await dependency.__anext__()
+    try:
+        assert session.bind is read_engine
+        assert not session.in_transaction()
+    finally:
+        await dependency.aclose()
+
+
+# ============================================================================
+# 🏊 Connection pool
+# ============================================================================
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_waits_and_timeouts(tmp_path):
+    """Checkouts, waits and pool timeouts are counted."""
+    pooled = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        async with pooled.connect():
+            stats = pool_stats(pooled)
+            assert stats["checkedout"] == 1
+            with pytest.raises(exc.TimeoutError):
+                async with pooled.connect():
+                    pass
+        stats = pool_stats(pooled)
+        assert stats["checkouts"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["wait_seconds_max"] >= 0.05
+        assert stats["overflow"] == 0
+    finally:
+        await pooled.dispose()
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_excludes_connection_setup_from_wait(tmp_path):
+    """Opening a new connection (and pre-pinging it) is not counted as queue wait."""
+    pooled = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_pre_ping=True,
+    )
+
+    @event.listens_for(pooled.sync_engine, "connect")
+    def slow_connect(dbapi_connection, connection_record):
+        time.sleep(0.1)
+
+    try:
+        async with pooled.connect():
+            pass
+        async with pooled.connect():
+            pass
+        stats = pool_stats(pooled)
+        assert stats["checkouts"] == 2
+        assert stats["wait_seconds_max"] < 0.05
+    finally:
+        await pooled.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_health_endpoint(client: AsyncClient):
+    """GET /health/pool → 200 with the pool class name."""
+    resp = await client.get("/health/pool")
+    assert resp.status_code == 200
+    assert resp.json()["pool_class"] == "InstrumentedQueuePool"
+
+
+# ============================================================================
+# 🔀 Read replicas
+# ============================================================================
+@pytest.mark.asyncio
+async def test_replica_router_round_robin_and_ejection(tmp_path):
+    """Replicas are used in turn; an ejected one is skipped until it recovers."""
+    now = [0.0]
+    primary = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replicas = [
+        create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path / f'replica{i}.db'}")
+        for i in range(2)
+    ]
+    router = ReplicaRouter(primary, replicas, eject_seconds=10, clock=lambda: now[0])
+    try:
+        assert [router.choose() for _ in range(4)] == [replicas[0], replicas[1]] * 2
+
+        router.eject(0)
+        assert [router.choose() for _ in range(3)] == [replicas[1]] * 3
+
+        router.eject(1)
+        assert router.choose() is primary
+
+        now[0] = 10.0
+        assert {router.choose(), router.choose()} == set(replicas)
+    finally:
+        for e in [primary, *replicas]:
+            await e.dispose()
+
+
+@pytest.mark.asyncio
+async def test_replica_router_ejects_unreachable_replica(tmp_path):
+    """A replica that fails to connect is taken out of rotation."""
+    primary = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    broken = create_engine_from_settings(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReplicaRouter(primary, [broken], eject_seconds=60)
+    try:
+        async with async_read_session(bind=router.choose()) as session:
+            with pytest.raises(exc.OperationalError):
+                await session.execute(text("SELECT 1"))
+        assert not router.is_healthy(0)
+        assert router.choose() is primary
+    finally:
+        await primary.dispose()
+        await broken.dispose()
@@ -0,0 +1,71 @@
+"""
+Tests for the bulk user import CLI (SQLite fallback path).
+"""
+
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cli.import_users import import_users
+from app.core.security import verify_password
+from app.models.user import User
+from tests.conftest import test_engine
+
+CSV_HEADER = "email,password,full_name,user_type,proof_url\n"
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+@pytest.mark.asyncio
+async def test_import_csv_reports_row_errors(db_session: AsyncSession, executor, tmp_path):
+    """Valid rows are imported; invalid and duplicate rows are reported by line."""
+    source = tmp_path / "users.csv"
+    source.write_text(
+        CSV_HEADER
+        + "Alice@Cinema.com,AlicePass1!,Alice,etudiant,https://example.com/a.jpg\n"
+        + "bob@cinema.com,weak,Bob,,\n"
+        + "alice@cinema.com,AlicePass2!,Alice Again,,\n"
+        + "carol@cinema.com,CarolPass1!,Carol,,\n"
+    )
+    errors = io.StringIO()
+    report = await import_users(
+        source, engine=test_engine, executor=executor, batch_size=2, errors_out=errors,
+    )
+    assert report.imported == 2
+    assert report.errors == 2
+    assert [json.loads(line)["line"] for line in errors.getvalue().splitlines()] == [3, 4]
+
+    users = {u.email: u for u in (await db_session.execute(select(User))).scalars()}
+    assert set(users) == {"alice@cinema.com", "carol@cinema.com"}
+    assert users["alice@cinema.com"].user_type == "etudiant"
+    assert verify_password("CarolPass1!", users["carol@cinema.com"].hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_import_jsonl_resumes_from_checkpoint(db_session: AsyncSession, executor, tmp_path):
+    """A second run skips lines already committed according to the checkpoint."""
+    source = tmp_path / "users.jsonl"
+    checkpoint = tmp_path / "users.ckpt"
+    rows = [
+        {"email": f"user{i}@cinema.com", "password": "ImportPass1!", "full_name": f"User {i}"}
+        for i in range(3)
+    ]
+    source.write_text("".join(json.dumps(r) + "\n" for r in rows[:2]))
+    first = await import_users(source, engine=test_engine, executor=executor, checkpoint=checkpoint)
+    assert (first.imported, checkpoint.read_text()) == (2, "2")
+
+    with source.open("a") as fh:
+        fh.write("{not json\n" + json.dumps(rows[2]) + "\n")
+    second = await import_users(source, engine=test_engine, executor=executor, checkpoint=checkpoint)
+    assert (second.imported, second.errors, second.last_line) == (1, 1, 4)
+
+    count = len((await db_session.execute(select(User))).scalars().all())
+    assert count == 3
@@ -0,0 +1,144 @@
+"""
+Tests for asymmetric JWT signing, key rotation and the JWKS endpoint.
+"""
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from httpx import AsyncClient
+from jose import jwt
+
+from app.core import keys
+from app.core.keys import KeyRing, jwk_thumbprint
+from app.core.security import create_access_token, decode_access_token
+from tests.test_users import TEST_USER, login_user, register_user
+
+
+def _pem_pair(kind: str) -> tuple[str, str]:
+    """Return a fresh ``(private PEM, public PEM)`` pair."""
+    if kind == "rsa":
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private = ec.generate_private_key(ec.SECP256R1())
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    ).decode()
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    return private_pem, public_pem
+
+
+@pytest.fixture
+def rs256(monkeypatch):
+    """Switch the app to an RS256 key ring; return its key pair."""
+    private_pem, public_pem = _pem_pair("rsa")
+    monkeypatch.setattr(keys, "keyring", KeyRing("RS256", private_pem=private_pem))
+    return private_pem, public_pem
+
+
+# ============================================================================
+# 🔑 Key ring
+# ============================================================================
+def test_rfc7638_thumbprint():
+    """Thumbprint of the RFC 7638 §3.1 example key."""
+    example = {
+        "kty": "RSA",
+        "e": "AQAB",
+        "n": (
+            "0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78LhWx4cbbfAAtVT86zwu1RK7aPFFxuhDR1L6tSoc_BJECP"
+            "ebWKRXjBZCiFV4n3oknjhMstn64tZ_2W-5JsGY4Hc5n9yBXArwl93lqt7_RN5w6Cf0h4QyQ5v-65YGjQR0_FDW2QvzqY"
+            "368QQMicAtaSqzs8KJZgnYb9c7d0zgdAZHzu6qMQvRL5hajrn1n91CbOpbISD08qNLyrdkt-bFTWhAI4vMQFh6WeZu0f"
+            "M4lFd2NcRwr3XPksINHaQ-G_xBniIqbw0Ls1jF44-csFCur-kEgU8awapJzKnqDKgw"
+        ),
+    }
+    assert jwk_thumbprint(example) == "NzbLsXh8uDCcd-6MNwXF4W_7noWXFZAfHkxZsRGC9Xs"
+
+
+def test_hs256_default_publishes_no_keys():
+    """The shared-secret setup has an empty JWKS and no kid header."""
+    ring = KeyRing("HS256", secret="s3cret")
+    assert ring.jwks == {"keys": []}
+    assert ring.headers is None
+    assert ring.verification_key("anything") == "s3cret"
+
+
+def test_unsupported_algorithms_rejected():
+    """EdDSA is not implemented by python-jose; asymmetric algs need a private key."""
+    with pytest.raises(ValueError):
+        KeyRing("EdDSA")
+    with pytest.raises(ValueError):
+        KeyRing("RS256")
+
+
+@pytest.mark.parametrize("algorithm, kind", [("RS256", "rsa"), ("ES256", "ec")])
+def test_asymmetric_tokens_carry_kid(monkeypatch, algorithm, kind):
+    """Tokens are signed with the current key and decoded via their kid."""
+    private_pem, public_pem = _pem_pair(kind)
+    ring = KeyRing(algorithm, private_pem=private_pem)
+    monkeypatch.setattr(keys, "keyring", ring)
+
+    token = create_access_token({"sub": "1", "type": "etudiant"})
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == algorithm
+    assert header["kid"] == ring.signing_kid
+    assert decode_access_token(token)["type"] == "etudiant"
+    # A consumer only needs the public key
+    assert jwt.decode(token, public_pem, algorithms=[algorithm])["sub"] == "1"
+
+
+def test_rotation_accepts_previous_key(monkeypatch):
+    """After rotation, tokens from the previous key still verify; unknown kids do not."""
+    old_private, old_public = _pem_pair("rsa")
+    new_private, _ = _pem_pair("rsa")
+    monkeypatch.setattr(keys, "keyring", KeyRing("RS256", private_pem=old_private))
+    old_token = create_access_token({"sub": "1"})
+
+    monkeypatch.setattr(keys, "keyring", KeyRing("RS256", private_pem=new_private, public_pems=(old_public,)))
+    assert decode_access_token(old_token)["sub"] == "1"
+    assert len(keys.keyring.jwks["keys"]) == 2
+    new_token = create_access_token({"sub": "2"})
+    assert jwt.get_unverified_header(new_token)["kid"] != jwt.get_unverified_header(old_token)["kid"]
+
+    monkeypatch.setattr(keys, "keyring", KeyRing("RS256", private_pem=new_private))
+    assert decode_access_token(old_token) is None
+
+
+def test_hs256_token_rejected_by_rs256_ring(rs256):
+    """A token signed with the shared secret is not accepted once keys are asymmetric."""
+    forged = jwt.encode({"sub": "1"}, "CHANGE_ME_IN_PRODUCTION", algorithm="HS256")
+    assert decode_access_token(forged) is None
+
+
+# ============================================================================
+# 🌐 /.well-known/jwks.json
+# ============================================================================
+@pytest.mark.asyncio
+async def test_jwks_endpoint_serves_public_keys(client: AsyncClient, rs256):
+    """The JWKS holds the public key only and verifies login tokens."""
+    resp = await client.get("/.well-known/jwks.json")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"].startswith("public, max-age=")
+    body = resp.json()
+    assert len(body["keys"]) == 1
+    key = body["keys"][0]
+    assert key["kid"] == keys.keyring.signing_kid
+    assert key["use"] == "sig"
+    assert "d" not in key
+
+    await register_user(client)
+    token = (await login_user(client)).json()["access_token"]
+    claims = jwt.decode(token, body, algorithms=["RS256"])
+    assert claims["type"] == "standard"
+
+    me = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["email"] == TEST_USER["email"]
+
+
+@pytest.mark.asyncio
+async def test_jwks_conditional_get(client: AsyncClient, rs256):
+    """A matching If-None-Match gets 304 without a body."""
+    first = await client.get("/.well-known/jwks.json")
+    resp = await client.get("/.well-known/jwks.json", headers={"If-None-Match": first.headers["etag"]})
+    assert resp.status_code == 304
+    assert resp.content == b""
@@ -0,0 +1,127 @@
+"""
+Tests for the metrics registry, middleware, /metrics endpoint and Server-Timing.
+"""
+
+import logging
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.metrics import Registry
+from app.db.database import normalize_sql
+from tests.test_users import get_auth_header, register_user
+
+
+# ============================================================================
+# 📈 Registry / text format
+# ============================================================================
+def test_registry_renders_prometheus_text():
+    """Counters, gauges and cumulative histogram buckets render as expected."""
+    reg = Registry()
+    hits = reg.counter("hits_total", "Hits.", ("route",))
+    hits.inc(route="/a")
+    hits.inc(2, route="/a")
+    reg.gauge("temperature", "Temp.", function=lambda: 21.5)
+    hist = reg.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5):
+        hist.observe(value)
+
+    text = reg.render()
+    assert "# TYPE hits_total counter" in text
+    assert 'hits_total{route="/a"} 3' in text
+    assert "temperature 21.5" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_label_values_are_escaped():
+    """Quotes and backslashes in label values are escaped."""
+    reg = Registry()
+    reg.counter("odd_total", "Odd.", ("path",)).inc(path='a"b\\c')
+    assert 'odd_total{path="a\\"b\\\\c"} 1' in reg.render()
+
+
+# ============================================================================
+# 🌐 /metrics
+# ============================================================================
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_db_and_hot_paths(client: AsyncClient):
+    """Requests, per-request SQL, bcrypt and JWT timings show up on /metrics."""
+    headers = await get_auth_header(client)
+    await client.get("/api/v1/users/me", headers=headers)
+
+    resp = await client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/users/me",status="200"}' in text
+    assert 'http_request_db_queries_count{route="/api/v1/users/register"}' in text
+    assert "db_query_duration_seconds_count" in text
+    assert 'password_hash_duration_seconds_count{op="hash"}' in text
+    assert 'password_hash_duration_seconds_count{op="verify"}' in text
+    assert 'jwt_duration_seconds_count{op="encode"}' in text
+    assert 'jwt_duration_seconds_count{op="decode"}' in text
+    assert "http_requests_in_flight 1" in text
+    assert "db_pool_size" in text
+
+
+@pytest.mark.asyncio
+async def test_unmatched_routes_share_one_label(client: AsyncClient):
+    """404s are grouped under <unmatched> to keep label cardinality bounded."""
+    await client.get("/no/such/path/123")
+    resp = await client.get("/metrics")
+    assert 'route="<unmatched>",status="404"' in resp.text
+    assert "/no/such/path/123" not in resp.text
+
+
+# ============================================================================
+# ⏱️ Server-Timing & slow-query log
+# ============================================================================
+@pytest.mark.asyncio
+async def test_server_timing_header(client: AsyncClient):
+    """Responses carry db / hash / total durations; hash only when bcrypt ran."""
+    resp = await register_user(client)
+    assert resp.status_code == 201
+    timing = resp.headers["server-timing"]
+    assert "db;dur=" in timing
+    assert "hash;dur=" in timing
+    assert "total;dur=" in timing
+
+    resp = await client.get("/health")
+    assert 'db;dur=0.0;desc="0 queries"' in resp.headers["server-timing"]
+    assert "hash;" not in resp.headers["server-timing"]
+
+
+@pytest.mark.asyncio
+async def test_server_timing_can_be_disabled(client: AsyncClient, monkeypatch):
+    """SERVER_TIMING_ENABLED=false drops the header."""
+    monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", False)
+    resp = await client.get("/health")
+    assert "server-timing" not in resp.headers
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log(client: AsyncClient, monkeypatch, caplog):
+    """Statements over the threshold are logged with the endpoint and normalized SQL."""
+    headers = await get_auth_header(client)
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0)
+    await client.get("/api/v1/users/me", headers=headers)  # warm the cache path
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="app.db.database"):
+        await client.put("/api/v1/users/me", json={"full_name": "Slow"}, headers=headers)
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages
+    assert all("PUT /api/v1/users/me" in m for m in messages)
+    assert any("UPDATE users SET" in m for m in messages)
+    assert not any("Slow" in m for m in messages)
+
+
+def test_normalize_sql():
+    """Literals, bind markers and IN lists collapse to placeholders."""
+    sql = "SELECT users.id\n  FROM users WHERE users.email = $1 AND users.id IN ($2, $3) LIMIT 10"
+    assert normalize_sql(sql) == "SELECT users.id FROM users WHERE users.email = ? AND users.id IN (?, ...) LIMIT ?"
+    assert normalize_sql("SELECT 'a''b', x::text FROM t WHERE y = :y") == "SELECT ?, x::text FROM t WHERE y = ?"
@@ -0,0 +1,136 @@
+"""
+Tests for rotating refresh tokens (POST /api/v1/users/refresh).
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.security import password_hash_pool
+from app.crud.refresh_token import hash_refresh_token, purge_expired_refresh_tokens
+from app.models.refresh_token import RefreshToken
+from tests.conftest import TestSession
+from tests.test_users import login_user, register_user
+
+
+async def _login(client: AsyncClient) -> dict:
+    await register_user(client)
+    resp = await login_user(client)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+async def _refresh(client: AsyncClient, token: str):
+    return await client.post("/api/v1/users/refresh", json={"refresh_token": token})
+
+
+# ============================================================================
+# 🔄 Rotation
+# ============================================================================
+@pytest.mark.asyncio
+async def test_login_returns_refresh_token(client: AsyncClient):
+    """Login hands out a refresh token next to the access token."""
+    body = await _login(client)
+    assert body["refresh_token"]
+    assert body["token_type"] == "bearer"
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_without_bcrypt(client: AsyncClient):
+    """A refresh returns a working access token and a new refresh token, no bcrypt call."""
+    body = await _login(client)
+    verifies = password_hash_pool.stats()["ops"]["verify"]["calls"]
+
+    resp = await _refresh(client, body["refresh_token"])
+    assert resp.status_code == 200
+    renewed = resp.json()
+    assert renewed["refresh_token"] != body["refresh_token"]
+    assert password_hash_pool.stats()["ops"]["verify"]["calls"] == verifies
+
+    me = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {renewed['access_token']}"})
+    assert me.status_code == 200
+    assert (await _refresh(client, renewed["refresh_token"])).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_only_digest_is_stored(client: AsyncClient):
+    """The raw refresh token never reaches the database."""
+    body = await _login(client)
+    async with TestSession() as db:
+        stored = (await db.execute(select(RefreshToken.token_hash))).scalars().all()
+    assert stored == [hash_refresh_token(body["refresh_token"])]
+
+
+@pytest.mark.asyncio
+async def test_unknown_refresh_token_rejected(client: AsyncClient):
+    """A token that was never issued → 401."""
+    resp = await _refresh(client, "not-a-real-token")
+    assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_expired_refresh_token_rejected(client: AsyncClient, monkeypatch):
+    """An expired token → 401, without revoking the session's access token."""
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_EXPIRE_DAYS", -1)
+    body = await _login(client)
+    assert (await _refresh(client, body["refresh_token"])).status_code == 401
+    me = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {body['access_token']}"})
+    assert me.status_code == 200
+
+
+# ============================================================================
+# 🚨 Reuse detection
+# ============================================================================
+@pytest.mark.asyncio
+async def test_reuse_revokes_family_and_access_tokens(client: AsyncClient):
+    """Replaying a used token kills its whole family and the user's access tokens."""
+    body = await _login(client)
+    renewed = (await _refresh(client, body["refresh_token"])).json()
+
+    replay = await _refresh(client, body["refresh_token"])
+    assert replay.status_code == 401
+
+    # The legitimate successor is revoked too
+    assert (await _refresh(client, renewed["refresh_token"])).status_code == 401
+    me = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {renewed['access_token']}"})
+    assert me.status_code == 401
+
+    async with TestSession() as db:
+        revoked = (await db.execute(select(RefreshToken.revoked_at))).scalars().all()
+    assert len(revoked) == 2
+    assert all(r is not None for r in revoked)
+
+
+# ============================================================================
+# 🧹 Pruning
+# ============================================================================
+@pytest.mark.asyncio
+async def test_rotation_keeps_two_rows_per_family(client: AsyncClient):
+    """Older used tokens are deleted; the last used one still triggers reuse detection."""
+    token = (await _login(client))["refresh_token"]
+    used = []
+    for _ in range(5):
+        used.append(token)
+        token = (await _refresh(client, token)).json()["refresh_token"]
+
+    async with TestSession() as db:
+        stored = set((await db.execute(select(RefreshToken.token_hash))).scalars())
+    assert stored == {hash_refresh_token(used[-1]), hash_refresh_token(token)}
+
+    assert (await _refresh(client, used[-1])).status_code == 401
+    assert (await _refresh(client, token)).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_only_expired_tokens(client: AsyncClient, monkeypatch):
+    live = (await _login(client))["refresh_token"]
+    monkeypatch.setattr(settings, "REFRESH_TOKEN_EXPIRE_DAYS", -1)
+    await login_user(client)
+    await login_user(client)
+
+    async with TestSession() as db:
+        async with db.begin():
+            assert await purge_expired_refresh_tokens(db) == 2
+        stored = (await db.execute(select(RefreshToken.token_hash))).scalars().all()
+    assert stored == [hash_refresh_token(live)]
@@ -0,0 +1,216 @@
+"""
+Unit tests for app.core.security primitives (hashing pool, bcrypt cost, token cache).
+"""
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core import security
+from app.core.cache import token_cache
+from app.core.config import settings
+from app.core.security import (
+    PasswordHashPool,
+    PasswordHashPoolBusy,
+    calibrate_bcrypt_rounds,
+    create_access_token,
+    decode_access_token,
+    get_password_hash,
+    get_password_hash_async,
+    is_revoked,
+    needs_rehash,
+    password_hash_rounds,
+    revoke_subject,
+    verify_password,
+    verify_password_async,
+)
+from app.models.user import User
+from tests.conftest import TestSession
+from tests.test_users import TEST_USER, login_user, register_user
+
+
+# ============================================================================
+# 🔐 Async password hashing pool
+# ============================================================================
+@pytest.mark.asyncio
+async def test_async_hash_and_verify_roundtrip():
+    """Hashing in the pool produces a hash the sync and async verifiers accept."""
+    hashed = await get_password_hash_async("PoolPassword1!")
+    assert verify_password("PoolPassword1!", hashed)
+    assert await verify_password_async("PoolPassword1!", hashed)
+    assert not await verify_password_async("WrongPassword1!", hashed)
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_rejects_when_queue_full():
+    """Calls beyond max_queue fail fast instead of piling up."""
+    pool = PasswordHashPool(kind="thread", workers=1, max_queue=1)
+    try:
+        first = asyncio.ensure_future(pool.run("hash", time.sleep, 0.2))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHashPoolBusy):
+            await pool.run("hash", lambda: None)
+        await first
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["ops"]["hash"]["calls"] == 1
+        assert stats["pending"] == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_does_not_block_event_loop():
+    """The event loop keeps ticking while a slow hash runs in the pool."""
+    pool = PasswordHashPool(kind="thread", workers=1, max_queue=4)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        await pool.run("hash", time.sleep, 0.2)
+    finally:
+        task.cancel()
+        pool.shutdown()
+    assert ticks >= 5
+
+
+# ============================================================================
+# ⚖️ bcrypt cost & rehash-on-login
+# ============================================================================
+def test_hash_uses_configured_rounds(monkeypatch):
+    """get_password_hash follows BCRYPT_ROUNDS unless a cost is passed."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert password_hash_rounds(get_password_hash("Pw123456!")) == 5
+    assert password_hash_rounds(get_password_hash("Pw123456!", rounds=4)) == 4
+
+
+def test_needs_rehash(monkeypatch):
+    """Hashes with another cost (or an unparsable format) need a rehash."""
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert not needs_rehash(get_password_hash("Pw123456!", rounds=5))
+    assert needs_rehash(get_password_hash("Pw123456!", rounds=4))
+    assert needs_rehash("not-a-bcrypt-hash")
+
+
+def test_calibration_stays_within_bounds():
+    """Calibration returns the floor for tiny targets and the ceiling for huge ones."""
+    assert calibrate_bcrypt_rounds(0.001, min_rounds=4, max_rounds=8) == 4
+    assert calibrate_bcrypt_rounds(1e9, min_rounds=4, max_rounds=8) == 8
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_cost(client: AsyncClient, monkeypatch):
+    """A login after a cost change stores a hash at the new cost, password unchanged."""
+    await register_user(client)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+
+    resp = await login_user(client)
+    assert resp.status_code == 200
+
+    async with TestSession() as db:
+        user = (await db.execute(select(User).where(User.email == TEST_USER["email"]))).scalar_one()
+    assert password_hash_rounds(user.hashed_password) == 5
+    assert verify_password(TEST_USER["password"], user.hashed_password)
+    assert (await login_user(client)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_login_keeps_hash_at_current_cost(client: AsyncClient):
+    """No rewrite when the stored hash already has the configured cost."""
+    await register_user(client)
+    async with TestSession() as db:
+        before = (await db.execute(select(User.hashed_password))).scalar_one()
+    await login_user(client)
+    async with TestSession() as db:
+        after = (await db.execute(select(User.hashed_password))).scalar_one()
+    assert before == after
+
+
+# ============================================================================
+# 🎟️ Verified-token cache & revocation
+# ============================================================================
+@pytest.fixture
+def fresh_token_cache():
+    token_cache.clear()
+    yield token_cache
+    token_cache.clear()
+    security.clear_revocations()
+
+
+def test_decode_is_served_from_cache(fresh_token_cache):
+    """The second decode of the same token skips verification."""
+    token = create_access_token({"sub": "7"})
+    first = decode_access_token(token)
+    misses = fresh_token_cache.misses
+    second = decode_access_token(token)
+    assert second == first
+    assert fresh_token_cache.hits == 1
+    assert fresh_token_cache.misses == misses
+
+
+def test_invalid_tokens_are_not_cached(fresh_token_cache):
+    """Failed verifications leave the cache empty."""
+    assert decode_access_token("not.a.jwt") is None
+    token = create_access_token({"sub": "7"})
+    assert decode_access_token(token[:-2] + "xx") is None
+    assert len(fresh_token_cache) == 0
+
+
+def test_cached_token_not_served_after_exp(fresh_token_cache, monkeypatch):
+    """A cached token stops being accepted once its exp has passed."""
+    token = create_access_token({"sub": "7"})
+    exp = decode_access_token(token)["exp"]
+    monkeypatch.setattr(security.time, "time", lambda: exp + 1)
+    assert decode_access_token(token) is None
+
+
+def test_revoked_subject_rejected_even_when_cached(fresh_token_cache):
+    """Revocation applies to cached tokens; later-issued tokens are unaffected."""
+    token = create_access_token({"sub": "7"})
+    payload = decode_access_token(token)
+    revoke_subject(7)
+    assert decode_access_token(token) is None
+    assert is_revoked(payload)
+    assert not is_revoked({**payload, "iat": payload["iat"] + 3600})
+    assert not is_revoked({**payload, "sub": "8"})
+
+
+def test_token_issued_same_second_after_revocation_accepted(fresh_token_cache, monkeypatch):
+    """Revocation is sub-second: a login right after it is not rejected."""
+    monkeypatch.setattr(security.time, "time", lambda: 1_800_000_000.25)
+    revoke_subject(7)
+    assert is_revoked({"sub": "7", "iat": 1_800_000_000.2})
+    assert not is_revoked({"sub": "7", "iat": 1_800_000_000.3})
+
+    monkeypatch.undo()
+    revoke_subject(7)
+    token = create_access_token({"sub": "7"})
+    assert decode_access_token(token)["sub"] == "7"
+
+
+def test_token_cache_disabled(monkeypatch):
+    """maxsize=0 still decodes, just without caching."""
+    monkeypatch.setattr(security, "token_cache", type(token_cache)(maxsize=0, ttl=60))
+    token = create_access_token({"sub": "7"})
+    assert decode_access_token(token)["sub"] == "7"
+    assert decode_access_token(token)["sub"] == "7"
+    assert len(security.token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_deleted_account_token_revoked(client: AsyncClient):
+    """DELETE /me revokes the caller's tokens immediately."""
+    await register_user(client)
+    token = (await login_user(client)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await client.delete("/api/v1/users/me", headers=headers)).status_code == 200
+    assert decode_access_token(token) is None
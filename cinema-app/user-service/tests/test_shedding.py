@@ -0,0 +1,156 @@
+"""
+Tests for adaptive load shedding (pressure levels, priorities, 503s, recovery).
+"""
+
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.shedding import (
+    DecayingAverage,
+    LoadShedder,
+    Priority,
+    load_shedder,
+    monitor_loop_lag,
+    route_priority,
+)
+from tests.test_throttle import FakeClock
+from tests.test_users import TEST_USER, login_user, register_user
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Give the global shedder fake-clock signals; return the clock."""
+    clock = FakeClock()
+    monkeypatch.setattr(load_shedder, "loop_lag", DecayingAverage(2.0, alpha=1.0, clock=clock))
+    monkeypatch.setattr(load_shedder, "pool_wait", DecayingAverage(2.0, alpha=1.0, clock=clock))
+    return clock
+
+
+def _pool_wait_ratio(ratio: float) -> None:
+    """Make the recent pool wait ``ratio`` times the threshold."""
+    load_shedder.pool_wait.observe(ratio * settings.SHED_POOL_WAIT_MS / 1000)
+
+
+# ============================================================================
+# 📉 Signals and levels
+# ============================================================================
+def test_decaying_average_halves_per_half_life():
+    """Samples are smoothed, then decay toward 0 while nothing is observed."""
+    clock = FakeClock()
+    avg = DecayingAverage(half_life=2.0, alpha=0.5, clock=clock)
+    avg.observe(1.0)
+    assert avg.value == pytest.approx(0.5)
+    avg.observe(1.0)
+    assert avg.value == pytest.approx(0.75)
+    clock.now += 2.0
+    assert avg.value == pytest.approx(0.375)
+    clock.now += 20.0
+    assert avg.value < 0.001
+
+
+def test_levels_follow_worst_signal(clock):
+    """Any single signal past its threshold raises the level."""
+    shedder = LoadShedder()
+    shedder.loop_lag = DecayingAverage(2.0, alpha=1.0, clock=clock)
+    shedder.pool_wait = DecayingAverage(2.0, alpha=1.0, clock=clock)
+    assert shedder.level() == 0
+
+    shedder.in_flight = settings.SHED_MAX_IN_FLIGHT
+    assert shedder.level() == 1
+    shedder.in_flight = 0
+
+    shedder.loop_lag.observe(2 * settings.SHED_LOOP_LAG_MS / 1000)
+    assert shedder.level() == 2
+    clock.now += 2.0
+    assert shedder.level() == 1
+    clock.now += 2.0
+    assert shedder.level() == 0
+
+
+def test_admission_by_priority(clock):
+    """Level 1 sheds LOW, level 2 also NORMAL; CRITICAL is never shed."""
+    assert all(load_shedder.admit(p) for p in Priority)
+    _pool_wait_ratio(1.5)
+    assert [load_shedder.admit(p) for p in Priority] == [True, True, True, False]
+    _pool_wait_ratio(3)
+    assert [load_shedder.admit(p) for p in Priority] == [True, True, False, False]
+    _pool_wait_ratio(100)
+    assert load_shedder.admit(Priority.CRITICAL)
+
+
+def test_route_priorities():
+    assert route_priority("GET", "/health") is Priority.CRITICAL
+    assert route_priority("GET", "/api/v1/users/me") is Priority.HIGH
+    assert route_priority("GET", "/api/v1/users/me/") is Priority.HIGH
+    assert route_priority("POST", "/api/v1/users/register") is Priority.LOW
+    assert route_priority("POST", "/api/v1/users/login") is Priority.NORMAL
+    assert route_priority("PUT", "/api/v1/users/me") is Priority.NORMAL
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_records_blocking():
+    """A blocked event loop shows up as lag."""
+    shedder = LoadShedder()
+    task = asyncio.create_task(monitor_loop_lag(shedder, interval=0.01))
+    await asyncio.sleep(0)
+    time.sleep(0.05)  # block the loop
+    await asyncio.sleep(0.03)
+    task.cancel()
+    assert shedder.loop_lag.value > 0.005
+
+
+# ============================================================================
+# 🚧 Middleware
+# ============================================================================
+@pytest.mark.asyncio
+async def test_low_priority_shed_first(client: AsyncClient, clock):
+    """Under pressure registration gets 503 while /me and /health are served."""
+    await register_user(client)
+    token = (await login_user(client)).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+
+    _pool_wait_ratio(1.5)
+    resp = await client.post("/api/v1/users/register", json={**TEST_USER, "email": "other@cinema.com"})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+    assert resp.json()["detail"] == "Service overloaded, please retry"
+    assert (await login_user(client)).status_code == 200
+    assert (await client.get("/api/v1/users/me", headers=auth)).status_code == 200
+    assert (await client.get("/health")).status_code == 200
+
+    metrics = (await client.get("/metrics")).text
+    assert 'http_requests_shed_total{priority="low"}' in metrics
+    assert "load_shedding_level 1" in metrics
+
+
+@pytest.mark.asyncio
+async def test_severe_pressure_keeps_only_high_priority(client: AsyncClient, clock):
+    """At level 2 login is shed too; /me keeps working."""
+    await register_user(client)
+    token = (await login_user(client)).json()["access_token"]
+
+    _pool_wait_ratio(3)
+    assert (await login_user(client)).status_code == 503
+    me = await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_recovers_when_pressure_decays(client: AsyncClient, clock):
+    """Once no slow samples arrive, the signals decay and traffic is admitted again."""
+    _pool_wait_ratio(3)
+    assert (await register_user(client)).status_code == 503
+    clock.now += 10.0
+    assert (await register_user(client)).status_code == 201
+    assert load_shedder.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_disabled_sheds_nothing(client: AsyncClient, clock, monkeypatch):
+    monkeypatch.setattr(settings, "SHED_ENABLED", False)
+    _pool_wait_ratio(100)
+    assert (await register_user(client)).status_code == 201
@@ -0,0 +1,185 @@
+"""
+Tests for single-flight coalescing (shared results, errors, cancellation, user lookups).
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight, coalesced_calls
+from app.crud import user as user_crud
+from app.crud.user import create_user, get_user_by_email, get_user_by_id
+from app.schemas.user import UserCreate
+from tests.conftest import TestSession
+from tests.test_crud import capture_sql
+
+
+def _coalesced(name: str) -> float:
+    return coalesced_calls.value(name=name)
+
+
+class Slow:
+    """Awaitable factory that counts calls and blocks until released."""
+
+    def __init__(self, result=None, error: Exception | None = None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+        self.cancelled = False
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+
+# ============================================================================
+# 🛫 SingleFlight
+# ============================================================================
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight("test_shared")
+    work = Slow(result=42)
+    callers = [asyncio.create_task(flights.do("k", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    work.release.set()
+    assert await asyncio.gather(*callers) == [42] * 5
+    assert work.calls == 1
+    assert _coalesced("test_shared") == 4
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_remembered_after_landing():
+    """A call after the flight finished runs again (this is not a cache)."""
+    flights = SingleFlight("test_sequential")
+    work = Slow(result="x")
+    work.release.set()
+    assert await flights.do("k", work) == "x"
+    assert await flights.do("k", work) == "x"
+    assert work.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    flights = SingleFlight("test_errors")
+    work = Slow(error=RuntimeError("db down"))
+    callers = [asyncio.create_task(flights.do("k", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    work.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert work.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight("test_cancel_one")
+    work = Slow(result=7)
+    first = asyncio.create_task(flights.do("k", work))
+    second = asyncio.create_task(flights.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    work.release.set()
+    assert await second == 7
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert not work.cancelled
+
+
+@pytest.mark.asyncio
+async def test_work_cancelled_when_last_caller_leaves():
+    flights = SingleFlight("test_cancel_all")
+    work = Slow(result=1)
+    caller = asyncio.create_task(flights.do("k", work))
+    await asyncio.sleep(0)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.sleep(0)
+    assert work.cancelled
+    assert len(flights) == 0
+
+    # The next caller starts a fresh flight
+    work.release.set()
+    assert await flights.do("k", work) == 1
+
+
+# ============================================================================
+# 👥 User lookups
+# ============================================================================
+async def _seed(db_session: AsyncSession) -> int:
+    user = await create_user(db_session, UserCreate(
+        email="popular@cinema.com", password="Popular123!", full_name="Popular",
+    ))
+    await db_session.commit()
+    return user.id
+
+
+@pytest.mark.asyncio
+async def test_parallel_lookups_issue_one_query(db_session: AsyncSession):
+    """Concurrent lookups by id (and by email) each share one SELECT."""
+    user_id = await _seed(db_session)
+    by_id = [TestSession() for _ in range(4)]
+    by_email = [TestSession() for _ in range(4)]
+    before = _coalesced("user_by_id")
+    with capture_sql(db_session) as statements:
+        users = await asyncio.gather(*(get_user_by_id(s, user_id) for s in by_id))
+        await asyncio.gather(*(get_user_by_email(s, "POPULAR@cinema.com") for s in by_email))
+    assert len(statements) == 2
+    assert _coalesced("user_by_id") - before == 3
+
+    # Each caller gets its own instance, attached to its own session
+    assert len({id(u) for u in users}) == 4
+    for session, user in zip(by_id, users):
+        assert user.email == "popular@cinema.com"
+        assert user in session
+    for session in by_id + by_email:
+        await session.close()
+
+
+@pytest.mark.asyncio
+async def test_missing_user_shared_as_none(db_session: AsyncSession):
+    sessions = [TestSession() for _ in range(3)]
+    with capture_sql(db_session) as statements:
+        assert await asyncio.gather(*(get_user_by_id(s, 999) for s in sessions)) == [None] * 3
+    assert len(statements) == 1
+    for session in sessions:
+        await session.close()
+
+
+@pytest.mark.asyncio
+async def test_lookups_inside_transaction_not_coalesced(db_session: AsyncSession, monkeypatch):
+    """A transaction sees its own writes, so it always queries its own session."""
+    async def unexpected(key, fn):
+        raise AssertionError("coalesced inside a transaction")
+
+    monkeypatch.setattr(user_crud._lookups_by_id, "do", unexpected)
+    user_id = await _seed(db_session)
+    await db_session.begin()
+    with capture_sql(db_session) as statements:
+        user = await get_user_by_id(db_session, user_id)
+    assert user.email == "popular@cinema.com"
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_coalescing_can_be_disabled(db_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(settings, "USER_LOOKUP_COALESCING", False)
+    user_id = await _seed(db_session)
+    sessions = [TestSession() for _ in range(3)]
+    with capture_sql(db_session) as statements:
+        await asyncio.gather(*(get_user_by_id(s, user_id) for s in sessions))
+    assert len(statements) == 3
+    for session in sessions:
+        await session.close()
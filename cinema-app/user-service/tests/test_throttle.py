@@ -0,0 +1,131 @@
+"""
+Tests for login / register throttling (token buckets, timing wheel, 429s).
+"""
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.throttle import MemoryBackend, load_backend
+from tests.test_users import TEST_USER, login_user, register_user
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ============================================================================
+# 🪣 MemoryBackend
+# ============================================================================
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_refills():
+    """`capacity` hits pass, the next waits 1/rate seconds, refill restores it."""
+    clock = FakeClock()
+    backend = MemoryBackend(clock=clock)
+    for _ in range(3):
+        assert await backend.hit("k", capacity=3, rate=0.5) == 0
+    assert await backend.hit("k", capacity=3, rate=0.5) == pytest.approx(2.0)
+
+    clock.now += 2.0
+    assert await backend.hit("k", capacity=3, rate=0.5) == 0
+    assert await backend.hit("k", capacity=3, rate=0.5) > 0
+
+
+@pytest.mark.asyncio
+async def test_refilled_buckets_are_swept():
+    """Buckets disappear once fully refilled; busy ones stay."""
+    clock = FakeClock()
+    backend = MemoryBackend(slots=8, tick=1.0, clock=clock)
+    await backend.hit("idle", capacity=2, rate=1.0)    # full again in 1 s
+    await backend.hit("busy", capacity=10, rate=1.0)
+    for _ in range(5):
+        await backend.hit("busy", capacity=10, rate=1.0)  # full again in 6 s
+    assert len(backend) == 2
+
+    clock.now += 3
+    await backend.hit("other", capacity=2, rate=1.0)
+    assert len(backend) == 2  # idle swept, busy + other remain
+
+    clock.now += 10
+    await backend.hit("other", capacity=2, rate=1.0)
+    assert len(backend) == 1
+
+
+@pytest.mark.asyncio
+async def test_buckets_beyond_one_revolution_survive():
+    """A refill time longer than the wheel span is not expired early."""
+    clock = FakeClock()
+    backend = MemoryBackend(slots=4, tick=1.0, clock=clock)
+    for _ in range(10):
+        await backend.hit("slow", capacity=10, rate=1.0)  # full again in 10 s
+    clock.now += 5
+    await backend.hit("other", capacity=1, rate=1.0)
+    assert await backend.hit("slow", capacity=10, rate=1.0) == 0
+    assert len(backend) == 2
+
+
+def test_load_backend_from_dotted_path():
+    """A custom backend can be plugged in as `module:factory`."""
+    assert isinstance(load_backend("memory"), MemoryBackend)
+    assert isinstance(load_backend("app.core.throttle:MemoryBackend"), MemoryBackend)
+
+
+# ============================================================================
+# 🚫 Endpoints
+# ============================================================================
+@pytest.mark.asyncio
+async def test_login_throttled_per_email(client: AsyncClient):
+    """After the email burst, further attempts get 429 + Retry-After; other emails pass."""
+    await register_user(client)
+    for _ in range(settings.THROTTLE_EMAIL_BURST - 1):
+        assert (await login_user(client, password="WrongPassword1!")).status_code == 401
+
+    resp = await login_user(client)
+    assert resp.status_code == 429
+    assert int(resp.headers["retry-after"]) >= 1
+
+    other = await login_user(client, email="someone@cinema.com", password="WrongPassword1!")
+    assert other.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_register_throttled_per_ip(client: AsyncClient, monkeypatch):
+    """The per-IP bucket covers registrations for any email."""
+    monkeypatch.setattr(settings, "THROTTLE_IP_BURST", 2)
+    for i in range(2):
+        resp = await register_user(client, user={**TEST_USER, "email": f"ip{i}@cinema.com"})
+        assert resp.status_code == 201
+    resp = await register_user(client, user={**TEST_USER, "email": "ip9@cinema.com"})
+    assert resp.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_forwarded_for_used_when_trusted(client: AsyncClient, monkeypatch):
+    """Behind a trusted proxy each X-Forwarded-For client gets its own bucket."""
+    monkeypatch.setattr(settings, "THROTTLE_IP_BURST", 1)
+    monkeypatch.setattr(settings, "THROTTLE_TRUST_FORWARDED_FOR", True)
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        resp = await client.post(
+            "/api/v1/users/login",
+            data={"username": f"{ip}@cinema.com", "password": "x"},
+            headers={"X-Forwarded-For": f"203.0.113.9, {ip}"},
+        )
+        assert resp.status_code == 401
+    resp = await client.post(
+        "/api/v1/users/login",
+        data={"username": "again@cinema.com", "password": "x"},
+        headers={"X-Forwarded-For": "10.0.0.1"},
+    )
+    assert resp.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_throttle_disabled(client: AsyncClient, monkeypatch):
+    """THROTTLE_ENABLED=false never answers 429."""
+    monkeypatch.setattr(settings, "THROTTLE_ENABLED", False)
+    for _ in range(settings.THROTTLE_EMAIL_BURST + 2):
+        assert (await login_user(client, password="WrongPassword1!")).status_code == 401
@@ -9,8 +9,17 @@ Coverage per route:
   - 🔁 Duplicate prevention
 """
 
+import base64
+import csv
+import io
+import json
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from tests.conftest import TestSession
 
 # ============================================================================
 # Helpers
@@ -463,6 +472,15 @@ async def test_update_me_empty_name(client: AsyncClient):
     assert resp.status_code == 422
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("field", ["email", "full_name", "user_type"])
+async def test_update_me_explicit_null_rejected(client: AsyncClient, field: str):
+    """null for a required column → 422 (not a misleading duplicate-email 400)."""
+    headers = await get_auth_header(client)
+    resp = await client.put("/api/v1/users/me", json={field: None}, headers=headers)
+    assert resp.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_update_me_sql_injection_name(client: AsyncClient):
     """SQL injection in update name → stored safely, no crash."""
@@ -477,6 +495,164 @@ async def test_update_me_sql_injection_name(client: AsyncClient):
     assert resp.json()["full_name"] == "'; DROP TABLE users;--"
 
 
+# ============================================================================
+# 🏷️ GET / PUT /me – ETag & conditional requests
+# ============================================================================
+@pytest.mark.asyncio
+async def test_get_me_returns_strong_etag(client: AsyncClient):
+    """GET /me carries a strong, stable ETag and must be revalidated."""
+    headers = await get_auth_header(client)
+    first = await client.get("/api/v1/users/me", headers=headers)
+    second = await client.get("/api/v1/users/me", headers=headers)
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert second.headers["etag"] == etag
+    assert first.headers["cache-control"] == "private, no-cache"
+
+
+@pytest.mark.asyncio
+async def test_get_me_if_none_match_returns_304(client: AsyncClient):
+    """A matching If-None-Match → 304, no body, no SQL once the user is cached."""
+    headers = await get_auth_header(client)
+    etag = (await client.get("/api/v1/users/me", headers=headers)).headers["etag"]
+    for value in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        resp = await client.get("/api/v1/users/me", headers={**headers, "If-None-Match": value})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["etag"] == etag
+        assert '"0 queries"' in resp.headers["server-timing"]
+
+
+@pytest.mark.asyncio
+async def test_get_me_stale_etag_returns_200(client: AsyncClient):
+    """After an update the old ETag no longer matches."""
+    headers = await get_auth_header(client)
+    old = (await client.get("/api/v1/users/me", headers=headers)).headers["etag"]
+    updated = await client.put("/api/v1/users/me", json={"full_name": "Renamed"}, headers=headers)
+    assert updated.headers["etag"] != old
+
+    resp = await client.get("/api/v1/users/me", headers={**headers, "If-None-Match": old})
+    assert resp.status_code == 200
+    assert resp.json()["full_name"] == "Renamed"
+    assert resp.headers["etag"] == updated.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_update_me_if_match_current_etag(client: AsyncClient):
+    """If-Match with the current ETag → update applied."""
+    headers = await get_auth_header(client)
+    etag = (await client.get("/api/v1/users/me", headers=headers)).headers["etag"]
+    resp = await client.put(
+        "/api/v1/users/me", json={"full_name": "Matched"}, headers={**headers, "If-Match": etag},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["full_name"] == "Matched"
+
+
+@pytest.mark.asyncio
+async def test_update_me_if_match_stale_etag_412(client: AsyncClient):
+    """A lost update is refused with 412 and the current ETag."""
+    headers = await get_auth_header(client)
+    etag = (await client.get("/api/v1/users/me", headers=headers)).headers["etag"]
+    first = await client.put(
+        "/api/v1/users/me", json={"full_name": "First"}, headers={**headers, "If-Match": etag},
+    )
+    assert first.status_code == 200
+
+    for value in (etag, f"W/{first.headers['etag']}"):
+        resp = await client.put(
+            "/api/v1/users/me", json={"full_name": "Second"}, headers={**headers, "If-Match": value},
+        )
+        assert resp.status_code == 412
+        assert resp.headers["etag"] == first.headers["etag"]
+    me = await client.get("/api/v1/users/me", headers=headers)
+    assert me.json()["full_name"] == "First"
+
+
+# ============================================================================
+# 🔢 PUT /me, /verify-type & DELETE /me – Optimistic concurrency
+# ============================================================================
+async def _write_from_another_worker(user_id: int) -> None:
+    """Change the row behind this process's back (its cached snapshot goes stale)."""
+    async with TestSession() as session:
+        await session.execute(
+            text("UPDATE users SET full_name = 'Elsewhere', version = version + 1 WHERE id = :id"),
+            {"id": user_id},
+        )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_update_me_stale_cache_without_if_match_succeeds(client: AsyncClient):
+    """Without If-Match, a lagging cached snapshot does not turn a sequential edit into a conflict."""
+    headers = await get_auth_header(client)
+    user_id = (await client.get("/api/v1/users/me", headers=headers)).json()["id"]
+    await _write_from_another_worker(user_id)
+
+    resp = await client.put("/api/v1/users/me", json={"full_name": "Mine"}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["full_name"] == "Mine"
+    assert (await client.get("/api/v1/users/me", headers=headers)).json()["full_name"] == "Mine"
+
+
+@pytest.mark.asyncio
+async def test_verify_type_stale_cache_succeeds(client: AsyncClient):
+    """verify-type sends no If-Match, so a lagging cached snapshot does not make it fail."""
+    headers = await get_auth_header(client)
+    user_id = (await client.get("/api/v1/users/me", headers=headers)).json()["id"]
+    await _write_from_another_worker(user_id)
+    resp = await client.post(
+        "/api/v1/users/verify-type",
+        json={"user_type": "etudiant", "proof_url": "https://example.com/card.jpg"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["user_type"] == "etudiant"
+
+
+@pytest.mark.asyncio
+async def test_update_me_if_match_checked_against_stored_row(client: AsyncClient):
+    """If-Match is compared with the database, not the (stale) cached snapshot."""
+    headers = await get_auth_header(client)
+    me = await client.get("/api/v1/users/me", headers=headers)
+    await _write_from_another_worker(me.json()["id"])
+
+    resp = await client.put(
+        "/api/v1/users/me", json={"full_name": "Mine"},
+        headers={**headers, "If-Match": me.headers["etag"]},
+    )
+    assert resp.status_code == 412
+    fresh = resp.headers["etag"]
+    assert fresh != me.headers["etag"]
+
+    resp = await client.put(
+        "/api/v1/users/me", json={"full_name": "Mine"}, headers={**headers, "If-Match": fresh},
+    )
+    assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_delete_me_concurrent_write_conflicts(client: AsyncClient, monkeypatch):
+    """DELETE /me racing another write → 409 (StaleDataError) and the account is kept."""
+    from app.api.v1.endpoints import users as users_endpoint
+
+    real_delete_user = users_endpoint.delete_user
+
+    async def delete_after_concurrent_write(db, user):
+        await db.execute(text("UPDATE users SET version = version + 1 WHERE id = :id"), {"id": user.id})
+        await real_delete_user(db, user)
+
+    monkeypatch.setattr(users_endpoint, "delete_user", delete_after_concurrent_write)
+    headers = await get_auth_header(client)
+
+    resp = await client.delete("/api/v1/users/me", headers=headers)
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Profile was modified by another request, reload and retry"
+
+    monkeypatch.undo()
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+
+
 # ============================================================================
 # 🗑️ DELETE /me – Success Cases
 # ============================================================================
@@ -783,3 +959,184 @@ async def test_verify_type_invalid_proof_url(client: AsyncClient):
         headers=headers,
     )
     assert resp.status_code == 422
+
+
+# ============================================================================
+# 🔗 POST /batch (internal)
+# ============================================================================
+INTERNAL_KEY = "test-internal-key"
+
+
+@pytest.fixture
+def internal_key(monkeypatch):
+    """Enable internal endpoints and return the X-API-Key header."""
+    monkeypatch.setattr(settings, "INTERNAL_API_KEY", INTERNAL_KEY)
+    return {"X-API-Key": INTERNAL_KEY}
+
+
+@pytest.mark.asyncio
+async def test_batch_users_in_request_order(client: AsyncClient, internal_key: dict):
+    """POST /batch → users in request order, unknown ids in missing."""
+    ids = []
+    for i in range(3):
+        resp = await register_user(client, user={
+            "email": f"batch{i}@cinema.com", "password": "BatchPass1!", "full_name": f"Batch {i}",
+        })
+        ids.append(resp.json()["id"])
+
+    resp = await client.post(
+        "/api/v1/users/batch",
+        json={"ids": [ids[2], 9999, ids[0], ids[2]]},
+        headers=internal_key,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [u["id"] for u in data["users"]] == [ids[2], ids[0]]
+    assert data["missing"] == [9999]
+    assert "hashed_password" not in data["users"][0]
+
+
+@pytest.mark.asyncio
+async def test_batch_users_requires_api_key(client: AsyncClient, internal_key: dict):
+    """POST /batch without / with a wrong X-API-Key → 403."""
+    resp = await client.post("/api/v1/users/batch", json={"ids": [1]})
+    assert resp.status_code == 403
+    resp = await client.post("/api/v1/users/batch", json={"ids": [1]}, headers={"X-API-Key": "nope"})
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_batch_users_disabled_without_configured_key(client: AsyncClient):
+    """No INTERNAL_API_KEY configured → internal endpoints are closed."""
+    resp = await client.post("/api/v1/users/batch", json={"ids": [1]}, headers={"X-API-Key": ""})
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_batch_users_too_many_ids(client: AsyncClient, internal_key: dict, monkeypatch):
+    """More ids than USER_BATCH_MAX_IDS → 422."""
+    monkeypatch.setattr(settings, "USER_BATCH_MAX_IDS", 2)
+    resp = await client.post("/api/v1/users/batch", json={"ids": [1, 2, 3]}, headers=internal_key)
+    assert resp.status_code == 422
+
+
+# ============================================================================
+# 📤 GET /export (internal)
+# ============================================================================
+async def register_many(client: AsyncClient, count: int, **extra) -> None:
+    for i in range(count):
+        await register_user(client, user={
+            "email": f"export{i}@cinema.com", "password": "ExportPass1!",
+            "full_name": f"Export {i}", **extra,
+        })
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(client: AsyncClient, internal_key: dict):
+    """GET /export → one JSON object per line, no password hashes."""
+    await register_many(client, 3)
+    resp = await client.get("/api/v1/users/export", headers=internal_key)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [u["email"] for u in lines] == [f"export{i}@cinema.com" for i in range(3)]
+    assert "hashed_password" not in lines[0]
+
+
+@pytest.mark.asyncio
+async def test_export_csv_gzip_filtered(client: AsyncClient, internal_key: dict):
+    """GET /export?format=csv&gzip=true&user_type=… → gzip CSV with header row."""
+    await register_many(client, 2)
+    await register_user(client, user={
+        "email": "student@cinema.com", "password": "StudentPass1!",
+        "full_name": "Student", "user_type": "etudiant",
+    })
+    resp = await client.get(
+        "/api/v1/users/export",
+        params={"format": "csv", "gzip": "true", "user_type": "etudiant"},
+        headers=internal_key,
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    rows = list(csv.reader(io.StringIO(resp.text)))
+    assert rows[0][:2] == ["id", "email"]
+    assert [r[1] for r in rows[1:]] == ["student@cinema.com"]
+
+
+@pytest.mark.asyncio
+async def test_export_requires_api_key(client: AsyncClient, internal_key: dict):
+    """GET /export without X-API-Key → 403."""
+    resp = await client.get("/api/v1/users/export")
+    assert resp.status_code == 403
+
+
+# ============================================================================
+# 📋 GET /users (internal, keyset pagination)
+# ============================================================================
+@pytest.mark.asyncio
+async def test_list_users_keyset_pages(client: AsyncClient, internal_key: dict):
+    """Walking next_cursor returns every user exactly once, newest first."""
+    await register_many(client, 5)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get("/api/v1/users", params=params, headers=internal_key)
+        assert resp.status_code == 200
+        page = resp.json()
+        assert len(page["items"]) <= 2
+        seen += [u["email"] for u in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"export{i}@cinema.com" for i in reversed(range(5))]
+
+
+@pytest.mark.asyncio
+async def test_list_users_filters(client: AsyncClient, internal_key: dict):
+    """user_type / is_active filters narrow the listing."""
+    await register_many(client, 2)
+    await register_user(client, user={
+        "email": "jobless@cinema.com", "password": "JoblessPass1!",
+        "full_name": "Jobless", "user_type": "chomeur",
+        "proof_url": "https://example.com/attestation.pdf",
+    })
+    resp = await client.get(
+        "/api/v1/users", params={"user_type": "chomeur", "is_active": "true"}, headers=internal_key,
+    )
+    items = resp.json()["items"]
+    assert [u["email"] for u in items] == ["jobless@cinema.com"]
+    assert items[0]["proof_url"] == "https://example.com/attestation.pdf"
+
+
+@pytest.mark.asyncio
+async def test_list_users_invalid_cursor(client: AsyncClient, internal_key: dict):
+    """Garbage cursor → 400."""
+    resp = await client.get("/api/v1/users", params={"cursor": "not-a-cursor"}, headers=internal_key)
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        '["2024-01-01T00:00:00", 1e400]',
+        '["2024-01-01T00:00:00", 2147483648]',
+        '["2024-01-01T00:00:00", true]',
+        '["2024-01-01T00:00:00", "7"]',
+        '[20240101, 7]',
+        '{"a": 1, "b": 2}',
+    ],
+)
+@pytest.mark.asyncio
+async def test_list_users_crafted_cursor(client: AsyncClient, internal_key: dict, payload: str):
+    """Well-formed base64 with out-of-range or mistyped values → 400, not 500."""
+    cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    resp = await client.get("/api/v1/users", params={"cursor": cursor}, headers=internal_key)
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_list_users_requires_api_key(client: AsyncClient):
+    """GET /users without X-API-Key → 403."""
+    resp = await client.get("/api/v1/users")
+    assert resp.status_code == 403